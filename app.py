@@ -7,13 +7,7 @@ from src.ui.gradio_app import main
 from src.db.setup_db import create_tables, load_orders_from_csv
 from src.db.database import SessionLocal
 from src.db.models import Order  # Import the Order model
-
-def setup_logging():
-    """Configure logging for the application"""
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
+from src.core.config import IS_HUGGINGFACE, setup_logging
 
 def ensure_database():
     """Ensure database is set up properly"""
@@ -30,11 +24,11 @@ def ensure_database():
                 logger.info("No orders found in database, loading initial data...")
                 load_orders_from_csv(db)
             else:
-                logger.info(f"Database already contains {order_count} orders")
+                logger.info("Database already contains %s orders", order_count)
         finally:
             db.close()
     except Exception as e:
-        logger.error(f"Database setup error: {e}", exc_info=True)
+        logger.error("Database setup error: %s", e, exc_info=True)
         raise
 
 def verify_database():
@@ -43,7 +37,7 @@ def verify_database():
 
     try:
         # Check data directory permissions
-        data_dir = "/app/data" if os.environ.get('HF_SPACE') == 'true' else "data"
+        data_dir = "/app/data" if IS_HUGGINGFACE else "data"
         os.makedirs(data_dir, exist_ok=True)
 
         # Verify write permissions
@@ -54,7 +48,7 @@ def verify_database():
             os.remove(test_file)
             logger.info("Data directory is writable")
         except Exception as e:
-            logger.error(f"Data directory write test failed: {e}")
+            logger.error("Data directory write test failed: %s", e)
             raise
 
         # Create and verify database
@@ -63,12 +57,12 @@ def verify_database():
         try:
             # Verify orders table
             order_count = db.query(func.count(Order.order_id)).scalar()
-            logger.info(f"Orders table verified with {order_count} records")
+            logger.info("Orders table verified with %s records", order_count)
 
             # Verify contact_requests table
             from src.db.models import ContactRequest
             contact_count = db.query(func.count(ContactRequest.id)).scalar()
-            logger.info(f"ContactRequest table verified with {contact_count} records")
+            logger.info("ContactRequest table verified with %s records", contact_count)
 
             if order_count == 0:
                 logger.info("Loading initial order data...")
@@ -77,7 +71,7 @@ def verify_database():
             db.close()
 
     except Exception as e:
-        logger.error(f"Database verification failed: {e}")
+        logger.error("Database verification failed: %s", e)
         raise
 
 if __name__ == "__main__":
@@ -97,5 +91,5 @@ if __name__ == "__main__":
         logger.info("Starting Gradio application...")
         main()
     except Exception as e:
-        logger.error(f"Application startup error: {e}", exc_info=True)
+        logger.error("Application startup error: %s", e, exc_info=True)
         raise
\ No newline at end of file
@@ -36,7 +36,7 @@ class BaseAgent(ABC):
         self.policy_service: Optional[PolicyService] = kwargs.get('policy_service')
         # Uncomment if ContactService becomes a class
         # self.contact_service: Optional[ContactService] = kwargs.get('contact_service')
-        logger.debug(f"Initialized {self.agent_name} with LLM service. Received service kwargs: {list(kwargs.keys())}")
+        logger.debug("Initialized %s with LLM service. Received service kwargs: %s", self.agent_name, kwargs.keys())
 
 
     @staticmethod
@@ -1,5 +1,6 @@
 # src/agents/human_rep_agent.py
 import logging
+import re
 from typing import List, Optional, Dict, Any
 from src.agents.base_agent import BaseAgent
 from src.core.state import ConversationState
@@ -20,6 +21,12 @@ KEY_HUMAN_REP_STEP = "human_rep_step"
 KEY_HUMAN_REP_NAME = "human_rep_name"
 KEY_HUMAN_REP_EMAIL = "human_rep_email"
 KEY_HUMAN_REP_PHONE = "human_rep_phone"
+# Collected contact details, cleared together when the flow restarts
+HUMAN_REP_DETAIL_KEYS = (KEY_HUMAN_REP_NAME, KEY_HUMAN_REP_EMAIL, KEY_HUMAN_REP_PHONE)
+
+# Precompiled input checks for the collection steps
+PHONE_DIGIT_PATTERN = re.compile(r'\d')
+SKIP_PHONE_REPLY = "skip"
 
 
 class HumanRepAgent(BaseAgent):
@@ -32,7 +39,7 @@ class HumanRepAgent(BaseAgent):
         super().__init__(llm_service, **kwargs)
         # This agent uses the standalone save_contact_request function.
         # If ContactService was class-based, we'd check for self.contact_service.
-        logger.info(f"{self.agent_name} initialized.")
+        logger.info("%s initialized.", self.agent_name)
 
     @staticmethod
     def get_required_service_keys() -> List[str]:
@@ -46,11 +53,15 @@ class HumanRepAgent(BaseAgent):
 
     def _update_step(self, state: ConversationState, step: str, data: Optional[Dict[str, Any]] = None):
         """Updates the current step and optionally adds data to state."""
-        entities_to_update = {KEY_HUMAN_REP_STEP: step}
-        if data:
-            entities_to_update.update(data)
+        entities_to_update = {KEY_HUMAN_REP_STEP: step, **data} if data else {KEY_HUMAN_REP_STEP: step}
         state.update_state(entities=entities_to_update)
-        logger.debug(f"Updated human rep state: Step={step}, Data added={list(data.keys()) if data else 'None'}")
+        logger.debug("Updated human rep state: Step=%s, Data added=%s", step, data.keys() if data else None)
+
+    def _clear_details(self, state: ConversationState):
+        """Removes any collected contact details from state."""
+        entities = state.extracted_entities
+        for key in HUMAN_REP_DETAIL_KEYS:
+            entities.pop(key, None)
 
 
     async def process(self, state: ConversationState, user_input: str, **kwargs) -> str:
@@ -68,7 +79,7 @@ class HumanRepAgent(BaseAgent):
             A string containing the agent's response (asking for info, confirming, or completion message).
         """
         current_step = self._get_current_step(state)
-        logger.debug(f"{self.agent_name} processing input. Current step: {current_step}")
+        logger.debug("%s processing input. Current step: %s", self.agent_name, current_step)
 
         response = "I'm sorry, something went wrong while processing your request for assistance." # Default error
 
@@ -89,7 +100,7 @@ class HumanRepAgent(BaseAgent):
                      response = "Please provide your full name so I can create the request."
                      # Stay in STATE_ASK_EMAIL, but don't save empty name
                 else:
-                     logger.info(f"Collected name: {name}")
+                     logger.info("Collected name: %s", name)
                      self._update_step(state, STATE_ASK_PHONE, data={KEY_HUMAN_REP_NAME: name})
                      response = f"Thanks, {name.split()[0]}! Now, could you please provide your email address?" # Use first name
 
@@ -102,7 +113,7 @@ class HumanRepAgent(BaseAgent):
                      response = "That doesn't look like a valid email address. Could you please provide your email?"
                      # Stay in STATE_ASK_PHONE, don't save invalid email
                 else:
-                     logger.info(f"Collected email: {email}")
+                     logger.info("Collected email: %s", email)
                      # Ask for optional phone number
                      self._update_step(state, STATE_CONFIRM, data={KEY_HUMAN_REP_EMAIL: email})
                      response = "Got it. Lastly, could you provide a phone number? You can also say 'skip' if you prefer not to."
@@ -111,16 +122,16 @@ class HumanRepAgent(BaseAgent):
                 # Expecting phone number or 'skip' in user_input.
                 phone = user_input.strip().lower()
                 collected_phone = None
-                if phone == 'skip':
+                if phone == SKIP_PHONE_REPLY:
                     logger.info("User skipped phone number.")
                     phone = None # Ensure it's None if skipped
                 else:
                     # Basic check: contains digits. More robust: regex for phone formats.
-                    if any(char.isdigit() for char in phone):
+                    if PHONE_DIGIT_PATTERN.search(phone):
                          collected_phone = phone # Store the provided phone number
-                         logger.info(f"Collected phone: {collected_phone}")
+                         logger.info("Collected phone: %s", collected_phone)
                     else:
-                         logger.warning(f"Potentially invalid phone input: {phone}. Storing as None.")
+                         logger.warning("Potentially invalid phone input: %s. Storing as None.", phone)
                          phone = None # Treat potentially invalid input as skipped for now
 
                 # Retrieve collected info from state
@@ -132,18 +143,16 @@ class HumanRepAgent(BaseAgent):
                     # Reset the flow
                     self._update_step(state, STATE_ASK_NAME)
                     # Clear potentially stored partial data
-                    state.extracted_entities.pop(KEY_HUMAN_REP_NAME, None)
-                    state.extracted_entities.pop(KEY_HUMAN_REP_EMAIL, None)
-                    state.extracted_entities.pop(KEY_HUMAN_REP_PHONE, None)
+                    self._clear_details(state)
                     response = "I seem to have missed some details. Let's start over. Could you please provide your full name?"
                 else:
                     # Save the request
-                    logger.info(f"Attempting to save contact request: Name={name}, Email={email}, Phone={collected_phone}")
+                    logger.info("Attempting to save contact request: Name=%s, Email=%s, Phone=%s", name, email, collected_phone)
                     success = save_contact_request(
                         full_name=name,
                         email=email,
                         phone_number=collected_phone,
-                        notes=f"User requested human assistance via chatbot. Last message: {state.history[-1]['parts'][0] if state.history else 'N/A'}" # Add context
+                        notes=f"User requested human assistance via chatbot. Last message: {state.history[-1].text if state.history else 'N/A'}" # Add context
                     )
 
                     if success:
@@ -164,12 +173,10 @@ class HumanRepAgent(BaseAgent):
                  response = "I've already logged your request for assistance. Our team will be in touch soon!"
 
         except Exception as e:
-            logger.error(f"Error during {self.agent_name} processing (Step: {current_step}): {e}", exc_info=True)
+            logger.error("Error during %s processing (Step: %s): %s", self.agent_name, current_step, e, exc_info=True)
             # Attempt to reset state on unexpected error
             state.extracted_entities.pop(KEY_HUMAN_REP_STEP, None)
-            state.extracted_entities.pop(KEY_HUMAN_REP_NAME, None)
-            state.extracted_entities.pop(KEY_HUMAN_REP_EMAIL, None)
-            state.extracted_entities.pop(KEY_HUMAN_REP_PHONE, None)
+            self._clear_details(state)
             response = "I encountered an unexpected error while handling your request. Please try asking for help again."
 
         return response
\ No newline at end of file
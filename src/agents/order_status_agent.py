@@ -20,14 +20,14 @@ class OrderStatusAgent(BaseAgent):
         # Ensure order_service is injected correctly
         self.order_service = kwargs.get('order_service')
         if not self.order_service:
-            logger.error(f"{self.agent_name} requires 'order_service' but it was not provided.")
+            logger.error("%s requires 'order_service' but it was not provided.", self.agent_name)
             # Consider raising an error or handling appropriately
             # raise ValueError(f"{self.agent_name} requires 'order_service'.")
         else:
             # Ensure it's the correct type if needed (optional)
             if not isinstance(self.order_service, OrderService):
-                 logger.warning(f"{self.agent_name} received 'order_service' but it might not be the expected type.")
-            logger.info(f"{self.agent_name} initialized and received OrderService.")
+                 logger.warning("%s received 'order_service' but it might not be the expected type.", self.agent_name)
+            logger.info("%s initialized and received OrderService.", self.agent_name)
 
 
     @staticmethod
@@ -40,7 +40,7 @@ class OrderStatusAgent(BaseAgent):
         Processes user input to check order status.
         Extracts ID, calls service, formats result, or asks for ID.
         """
-        logger.debug(f"{self.agent_name} processing input: '{user_input}'")
+        logger.debug("%s processing input: '%s'", self.agent_name, user_input)
         order_id: Optional[str] = None
 
         # 1. Check state (optional)
@@ -48,12 +48,9 @@ class OrderStatusAgent(BaseAgent):
 
         # 2. Try extracting from current input
         if not order_id:
-            # --- ADD DETAILED LOGGING HERE ---
-            logger.info(f"Attempting to extract order ID from user_input: type={type(user_input)}, value='{user_input}'")
-            # --- END ADDED LOGGING ---
             order_id = extract_order_id(user_input) # Call the helper function
             if order_id:
-                logger.info(f"Extracted order ID from user input: {order_id}")
+                logger.info("Extracted order ID from user input: %s", order_id)
                 # Optional: Store extracted ID in state
                 # state.update_state(entities={'order_id': order_id})
             else:
@@ -61,25 +58,25 @@ class OrderStatusAgent(BaseAgent):
 
         # 3. If Order ID is available, get status
         if order_id:
-            logger.info(f"Querying order status for ID: {order_id} using OrderService instance.")
+            logger.info("Querying order status for ID: %s using OrderService instance.", order_id)
             if not self.order_service:
-                logger.error(f"{self.agent_name} cannot process: OrderService not available.")
+                logger.error("%s cannot process: OrderService not available.", self.agent_name)
                 return "Sorry, the order checking service is currently unavailable."
 
             try:
                 order_data = await self.order_service.get_order_status_by_id(order_id)
 
                 if order_data:
-                    logger.info(f"Order found for ID {order_id}. Formatting details.")
+                    logger.info("Order found for ID %s. Formatting details.", order_id)
                     # The order_data received from the service is already the formatted string.
                     # No need to call format_order_details again.
                     return order_data # Return the formatted string directly
                 else:
-                    logger.warning(f"Order ID {order_id} not found by OrderService.")
+                    logger.warning("Order ID %s not found by OrderService.", order_id)
                     return f"Sorry, I couldn't find any order with the ID '{order_id}'. Please double-check the ID."
 
             except Exception as e:
-                logger.error(f"Error calling OrderService for ID {order_id}: {e}", exc_info=True)
+                logger.error("Error calling OrderService for ID %s: %s", order_id, e, exc_info=True)
                 return "Sorry, I encountered an error while checking the order status."
 
         # 4. If no Order ID found, ask for it
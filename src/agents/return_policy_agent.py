@@ -18,9 +18,9 @@ class ReturnPolicyAgent(BaseAgent):
         super().__init__(llm_service, **kwargs)
         self.policy_service: PolicyService = kwargs.get('policy_service')
         if not self.policy_service:
-            logger.error(f"{self.agent_name} requires PolicyService but it was not provided.")
+            logger.error("%s requires PolicyService but it was not provided.", self.agent_name)
             raise ValueError(f"{self.agent_name} requires PolicyService.")
-        logger.info(f"{self.agent_name} initialized with PolicyService.")
+        logger.info("%s initialized with PolicyService.", self.agent_name)
 
     @staticmethod
     def get_required_service_keys() -> List[str]:
@@ -31,7 +31,7 @@ class ReturnPolicyAgent(BaseAgent):
         """
         Processes user input related to return policies. Retrieves the general policy.
         """
-        logger.debug(f"{self.agent_name} processing input: '{user_input}'")
+        logger.debug("%s processing input: '%s'", self.agent_name, user_input)
 
         try:
             # Get the general return policy string using the service
@@ -42,14 +42,14 @@ class ReturnPolicyAgent(BaseAgent):
                  logger.warning("General return policy not found by the service.")
                  policy_info = "I couldn't find the specific return policy information right now."
 
-            logger.info(f"Providing general return policy information.")
+            logger.info("Providing general return policy information.")
             # Ensure policy_info is a string before returning
             if not isinstance(policy_info, str):
-                 logger.error(f"Policy service returned non-string type: {type(policy_info)}. Returning error message.")
+                 logger.error("Policy service returned non-string type: %s. Returning error message.", type(policy_info))
                  return "Sorry, there was an issue retrieving the policy format."
 
             return policy_info
 
         except Exception as e:
-            logger.error(f"Error retrieving policy information in {self.agent_name}: {e}", exc_info=True)
+            logger.error("Error retrieving policy information in %s: %s", self.agent_name, e, exc_info=True)
             return "Sorry, I encountered an issue retrieving the return policy information at the moment."
\ No newline at end of file
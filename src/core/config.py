@@ -2,13 +2,33 @@
 import os
 from dotenv import load_dotenv
 import logging # Added
+from functools import lru_cache
 from pathlib import Path
+from types import MappingProxyType
+from typing import NamedTuple, Optional
 
 load_dotenv()
 logger = logging.getLogger(__name__) # Added
 
+
+# --- Environment (read once) ---
+class EnvConfig(NamedTuple):
+    """Snapshot of the environment variables the app depends on."""
+    GOOGLE_API_KEY: Optional[str]
+    IS_HUGGINGFACE: bool
+
+
+@lru_cache(maxsize=1)
+def _env() -> EnvConfig:
+    """Reads the environment once; call _env.cache_clear() to re-read (e.g. in tests)."""
+    return EnvConfig(
+        GOOGLE_API_KEY=os.getenv("GOOGLE_API_KEY"),
+        IS_HUGGINGFACE=os.environ.get('HF_SPACE') == 'true',
+    )
+
+
 # --- Essential Credentials ---
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+GOOGLE_API_KEY = _env().GOOGLE_API_KEY
 if not GOOGLE_API_KEY:
     logger.error("FATAL: GOOGLE_API_KEY not found in environment variables.")
     raise ValueError("GOOGLE_API_KEY not found in environment variables.")
@@ -16,8 +36,7 @@ else:
     logger.info("GOOGLE_API_KEY loaded successfully.")
 
 # --- Database Configuration ---
-# --- Database Configuration ---
-IS_HUGGINGFACE = os.environ.get('HF_SPACE') == 'true'
+IS_HUGGINGFACE = _env().IS_HUGGINGFACE
 
 if IS_HUGGINGFACE:
     # Use absolute paths for Hugging Face
@@ -31,7 +50,11 @@ DATABASE_NAME = "chatbot_data.db"
 DB_PATH = os.path.join(DATA_DIR, DATABASE_NAME)
 # SQLAlchemy Database URL
 SQLALCHEMY_DATABASE_URL = f"sqlite:///{os.path.abspath(DB_PATH)}" # Use absolute path for SQLAlchemy/Alembic
-logger.info(f"Database path configured: {SQLALCHEMY_DATABASE_URL}")
+logger.info("Database path configured: %s", SQLALCHEMY_DATABASE_URL)
+# Connection pool: sized for concurrent chat events (each order lookup holds one connection
+# on a worker thread); SQLite connections are local, so pre-ping/recycle are unnecessary
+DB_POOL_SIZE = 20
+DB_MAX_OVERFLOW = 20
 
 # --- Data File Paths ---
 ORDERS_CSV_PATH = os.path.join(DATA_DIR, "cached_orders.csv") # Using your provided CSV
@@ -41,11 +64,21 @@ ORDERS_TABLE_NAME = "orders" # Table name for orders in DB
 
 # --- Logging Configuration (Basic Example) ---
 LOGGING_LEVEL = logging.INFO # Change to DEBUG for more detail
-logging.basicConfig(level=LOGGING_LEVEL, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+LOGGING_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+_logging_configured = False
+
+
+def setup_logging(level: int = LOGGING_LEVEL) -> None:
+    """Configures root logging once; entry points call this, later calls are no-ops."""
+    global _logging_configured
+    if _logging_configured:
+        return
+    logging.basicConfig(level=level, format=LOGGING_FORMAT)
+    _logging_configured = True
 
 # Ensure data directory exists
 os.makedirs(DATA_DIR, exist_ok=True)
-logger.info(f"Ensured data directory exists: {os.path.abspath(DATA_DIR)}")
+logger.info("Ensured data directory exists: %s", os.path.abspath(DATA_DIR))
 
 # --- Gemini LLM Configuration (Adapted from your GEMINI_CONFIG) ---
 GEMINI_MODEL_NAME = "gemini-1.5-pro" # Or "gemini-1.5-flash"
@@ -75,7 +108,8 @@ Guidelines:
 """
 
 # --- Order Status Descriptions (Copied from your config) ---
-ORDER_STATUS_DESCRIPTIONS = {
+# Read-only view so the shared table cannot be mutated at runtime
+ORDER_STATUS_DESCRIPTIONS = MappingProxyType({
     "created": "Your order has been created but not yet processed. Payment is being verified.",
     "approved": "Your payment has been approved and your order is being prepared for shipping.",
     "processing": "Your order is currently being processed in our warehouse.",
@@ -85,7 +119,4 @@ ORDER_STATUS_DESCRIPTIONS = {
     "unavailable": "Some items in your order are currently unavailable.",
     "invoiced": "Your order has been invoiced and is being prepared for shipping."
     # Add any other statuses present in cached_orders.csv if needed
-}
-
-# --- Logging Configuration (Basic) ---
-LOGGING_LEVEL = logging.INFO # Change to DEBUG for more detail
\ No newline at end of file
+})
\ No newline at end of file
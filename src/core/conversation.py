@@ -1,8 +1,12 @@
 # src/core/conversation.py
 import logging
-import uuid
-from datetime import datetime
-from typing import List, Dict, Optional, Any # Added Any
+import re
+import secrets
+from collections import OrderedDict
+from functools import lru_cache
+from datetime import datetime, timedelta
+from enum import IntEnum
+from typing import List, Dict, Optional, Any, Tuple, AsyncIterator # Added Any
 from src.core.state import ConversationState
 from src.llm.interface import LLMInterface
 # from src.llm.gemini_service import GeminiService # Keep import generic if possible
@@ -18,10 +22,67 @@ from src.services.order_service import OrderService
 # Import ContactService if it becomes a class, otherwise remove comment
 # from src.services.contact_service import ContactService
 
-from src.core.config import MAX_CONVERSATION_HISTORY
 
 logger = logging.getLogger(__name__)
 
+class Intent(IntEnum):
+    """Intents the manager routes on; values index the per-manager agent table."""
+    CHECK_ORDER_STATUS = 0
+    ASK_RETURN_POLICY = 1
+    REQUEST_HUMAN = 2
+    GENERAL_QUERY = 3
+    UNKNOWN = 4
+
+
+# Maps the intent strings exchanged with the LLM onto Intent members
+INTENT_BY_NAME: Dict[str, Intent] = {intent.name.lower(): intent for intent in Intent}
+
+# Single agent -> intent routing table, shared by every ConversationManager
+AGENT_INTENTS = (
+    (OrderStatusAgent, "check_order_status"),
+    (ReturnPolicyAgent, "ask_return_policy"),
+    (HumanRepAgent, "request_human"),
+)
+# Human rep steps where the flow is not mid-collection, so intent detection runs as usual
+HUMAN_REP_IDLE_STEPS = frozenset({STATE_ASK_NAME, STATE_COMPLETE})
+# Intents answered by the LLM directly rather than by an agent
+GENERAL_INTENTS = frozenset({Intent.GENERAL_QUERY, Intent.UNKNOWN})
+# Unambiguous inputs that can be classified without an LLM round-trip, checked in order
+# (most specific first: an order ID in the message outweighs any keyword around it)
+QUICK_INTENTS = (
+    (re.compile(r'\b[a-zA-Z0-9]{32}\b'), "check_order_status"),
+    # Only an explicit request to be put through; a bare "human"/"agent" (e.g. "are you a human?")
+    # is left to the LLM rather than starting the contact-collection flow
+    (re.compile(r'\b(speak|talk|connect|transfer)\b.*\b(human|agent|representative|real person|someone)\b', re.IGNORECASE), "request_human"),
+    (re.compile(r'\b(return|returns|refund|exchange)\b', re.IGNORECASE), "ask_return_policy"),
+    # Bare "order"/"status"/"where" also show up in new-order and general questions, so only
+    # tracking wording is taken as a status request without asking the LLM
+    (re.compile(r'\b(track|tracking)\b', re.IGNORECASE), "check_order_status"),
+)
+
+# Canned replies used when no agent can produce an answer
+RESPONSE_AGENT_ERROR = "I'm sorry, I encountered an error trying to handle your request. Could you please try rephrasing?"
+RESPONSE_NO_HANDLER = "I'm sorry, I'm not sure how to handle that specific request. Can I help with order status, return policies, or connecting you to a human representative?"
+
+
+@lru_cache(maxsize=None)
+def _required_service_keys(agent_cls: type) -> Tuple[str, ...]:
+    """Resolves an agent class's required service keys once per process."""
+    return tuple(agent_cls.get_required_service_keys())
+
+
+def _reset_human_rep_flow(state: ConversationState) -> None:
+    """Drops the human rep step so a failed flow restarts from the beginning next turn."""
+    state.extracted_entities.pop(KEY_HUMAN_REP_STEP, None)
+
+
+def _quick_intent(user_input: str) -> Optional[str]:
+    """Returns the intent for trivially classifiable input, or None if the LLM should decide."""
+    for pattern, intent in QUICK_INTENTS:
+        if pattern.search(user_input):
+            return intent
+    return None
+
 class ConversationManager:
     """
     Manages conversation state, intent detection, and agent routing.
@@ -34,10 +95,11 @@ class ConversationManager:
             llm_service: An instance of a class implementing LLMInterface (e.g., GeminiService).
         """
         self.llm_service = llm_service
-        self.conversation_states: Dict[str, ConversationState] = {} # Stores state per session_id
+        # Stores state per session_id, ordered from least to most recently active
+        self.conversation_states: "OrderedDict[str, ConversationState]" = OrderedDict()
 
         # --- Instantiate required services ---
-        # Singleton pattern in PolicyService means this gets the single instance
+        # Policies are loaded once per process and shared by every PolicyService
         self.policy_service = PolicyService()
         # Instantiate OrderService CLASS
         self.order_service = OrderService()
@@ -53,51 +115,41 @@ class ConversationManager:
             # Add contact_service if it's a class instance
             # 'contact_service': self.contact_service,
         }
-        logger.info(f"Available services for agent injection: {list(self.available_services.keys())}")
+        logger.info("Available services for agent injection: %s", list(self.available_services.keys()))
 
         # Instantiate agents and map them to intents
         self.agents: Dict[str, BaseAgent] = self._load_agents()
         self.intents: List[str] = list(self.agents.keys())
-        logger.info(f"ConversationManager initialized with intents: {self.intents}")
+        self._agent_table = self._build_agent_table(self.agents)
+        logger.info("ConversationManager initialized with intents: %s", self.intents)
+
+    @staticmethod
+    def _build_agent_table(agents: Dict[str, BaseAgent]) -> Tuple[Optional[BaseAgent], ...]:
+        """Returns the loaded agents as a tuple indexed by Intent (None where no agent handles it)."""
+        return tuple(agents.get(intent.name.lower()) for intent in Intent)
 
 
     def _load_agents(self) -> Dict[str, BaseAgent]:
         """Instantiates and returns a dictionary of agents mapped to their intents."""
         agents = {}
-        agent_classes = [OrderStatusAgent, ReturnPolicyAgent, HumanRepAgent]
-        intent_map = {
-            # Map class to intent string
-            OrderStatusAgent: "check_order_status",
-            ReturnPolicyAgent: "ask_return_policy",
-            HumanRepAgent: "request_human",
-        }
-
-        for agent_cls in agent_classes:
-            intent = intent_map.get(agent_cls)
-            if not intent:
-                 logger.warning(f"No intent mapping found for agent class {agent_cls.__name__}. Skipping.")
-                 continue
-
+        for agent_cls, intent in AGENT_INTENTS:
             try:
-                required_keys = agent_cls.get_required_service_keys()
-                logger.debug(f"Agent {agent_cls.__name__} requires services: {required_keys}")
-                services_for_agent = {
-                    key: self.available_services[key]
-                    for key in required_keys if key in self.available_services
-                }
+                required_keys = _required_service_keys(agent_cls)
+                logger.debug("Agent %s requires services: %s", agent_cls.__name__, required_keys)
 
                 # Check if all required services were found
-                if len(services_for_agent) != len(required_keys):
-                     missing = set(required_keys) - set(services_for_agent.keys())
-                     logger.error(f"Cannot initialize agent {agent_cls.__name__}. Missing required services: {missing}. Available: {list(self.available_services.keys())}")
+                missing = [key for key in required_keys if key not in self.available_services]
+                if missing:
+                     logger.error("Cannot initialize agent %s. Missing required services: %s. Available: %s", agent_cls.__name__, missing, list(self.available_services.keys()))
                      continue # Skip this agent
+                services_for_agent = {key: self.available_services[key] for key in required_keys}
 
                 # Instantiate agent, passing services as keyword arguments
                 agents[intent] = agent_cls(llm_service=self.llm_service, **services_for_agent)
-                logger.info(f"Successfully loaded agent '{agent_cls.agent_name}' for intent '{intent}' with services: {list(services_for_agent.keys())}")
+                logger.info("Successfully loaded agent '%s' for intent '%s' with services: %s", agent_cls.agent_name, intent, list(services_for_agent.keys()))
 
             except Exception as e:
-                logger.error(f"Failed to initialize agent {agent_cls.__name__}: {e}", exc_info=True)
+                logger.error("Failed to initialize agent %s: %s", agent_cls.__name__, e, exc_info=True)
 
         return agents
 
@@ -105,21 +157,18 @@ class ConversationManager:
     def _get_or_create_state(self, session_id: Optional[str] = None) -> ConversationState:
         """Retrieves or creates a ConversationState for a given session ID."""
         if session_id is None:
-            session_id = str(uuid.uuid4())
-            logger.info(f"No session ID provided. Created new session: {session_id}")
+            session_id = secrets.token_hex(16)
+            logger.info("No session ID provided. Created new session: %s", session_id)
 
-        if session_id not in self.conversation_states:
-            logger.info(f"Creating new conversation state for session: {session_id}")
-            self.conversation_states[session_id] = ConversationState(session_id=session_id)
+        state = self.conversation_states.get(session_id)
+        if state is None:
+            logger.info("Creating new conversation state for session: %s", session_id)
+            state = self.conversation_states[session_id] = ConversationState(session_id=session_id)
         else:
-             logger.debug(f"Found existing conversation state for session: {session_id}")
-
-        # Trim history if it exceeds the maximum length
-        state = self.conversation_states[session_id]
-        if len(state.history) > MAX_CONVERSATION_HISTORY:
-             logger.debug(f"Trimming history for session {session_id} from {len(state.history)} to {MAX_CONVERSATION_HISTORY}")
-             state.history = state.history[-MAX_CONVERSATION_HISTORY:]
+             logger.debug("Found existing conversation state for session: %s", session_id)
+             self.conversation_states.move_to_end(session_id)
 
+        # History is a deque bounded by MAX_CONVERSATION_HISTORY, so no trimming is needed here
         return state
 
     async def handle_message(self, user_input: str, session_id: Optional[str] = None) -> Dict[str, str]:
@@ -134,98 +183,167 @@ class ConversationManager:
         Returns:
             A dictionary containing the 'response' string and the 'session_id'.
         """
+        state, now, selected_agent, intent, intent_id = await self._begin_turn(user_input, session_id)
+
+        if selected_agent is None and intent_id in GENERAL_INTENTS:
+            logger.info("Handling as general query using LLM.")
+            # Use the LLM's general generation capability (async, so the event loop stays free)
+            bot_response = await self.llm_service.agenerate_response(
+                prompt=user_input, # Pass user input directly
+                history=state.get_history() # Provide history
+            )
+            state.update_state(agent='llm_general_response', now=now)
+        else:
+            bot_response = await self._agent_response(state, user_input, now, selected_agent, intent, intent_id)
+
+        return self._finish_turn(state, bot_response, now)
+
+    async def handle_message_stream(self, user_input: str, session_id: Optional[str] = None) -> AsyncIterator[Dict[str, str]]:
+        """
+        Streaming variant of handle_message().
+
+        General queries are streamed from the LLM as they are generated; agent replies arrive
+        in one piece. Each update carries the response text so far, and the last one is the
+        complete response, recorded in the conversation history.
+
+        Args:
+            user_input: The text message from the user.
+            session_id: The unique identifier for the conversation session. If None, a new one is created.
+
+        Yields:
+            Dictionaries containing the 'response' string so far and the 'session_id'.
+        """
+        state, now, selected_agent, intent, intent_id = await self._begin_turn(user_input, session_id)
+
+        if selected_agent is None and intent_id in GENERAL_INTENTS:
+            logger.info("Streaming general query response from LLM.")
+            chunks = []
+            try:
+                async for chunk in self.llm_service.astream_response(
+                    prompt=user_input,
+                    history=state.get_history()
+                ):
+                    chunks.append(chunk)
+                    yield {"response": "".join(chunks), "session_id": state.session_id}
+                bot_response = "".join(chunks)
+                state.update_state(agent='llm_general_response', now=now)
+            except Exception as e:
+                # The stream broke off mid-reply; replace the partial text rather than record it as the answer
+                logger.error("Error streaming LLM response: %s", e, exc_info=True)
+                bot_response = RESPONSE_AGENT_ERROR
+        else:
+            bot_response = await self._agent_response(state, user_input, now, selected_agent, intent, intent_id)
+
+        yield self._finish_turn(state, bot_response, now)
+
+    async def _begin_turn(
+        self, user_input: str, session_id: Optional[str]
+    ) -> Tuple[ConversationState, datetime, Optional[BaseAgent], Optional[str], Optional[Intent]]:
+        """Records the user message and picks the agent (or general/fallback intent) for this turn."""
         state = self._get_or_create_state(session_id)
         session_id = state.session_id # Ensure we have the definitive session ID
 
-        logger.info(f"Handling message for session {session_id}: '{user_input[:50]}...'")
+        logger.info("Handling message for session %s: '%.50s...'", session_id, user_input)
+
+        # One timestamp for the whole turn instead of one per state mutation
+        now = datetime.now()
 
         # Add user message to state
-        state.add_message(role="user", text=user_input)
+        state.add_message(role="user", text=user_input, now=now)
 
         # --- Determine Agent ---
         selected_agent: Optional[BaseAgent] = None
         intent: Optional[str] = None
+        intent_id: Optional[Intent] = None
 
         # Check if HumanRepAgent flow is active and not completed/just started
         human_rep_step = state.extracted_entities.get(KEY_HUMAN_REP_STEP)
-        # Check if the intent is already set to request_human (e.g., from previous turn asking for name)
-        is_human_rep_intent = state.current_intent == "request_human"
 
         # Prioritize active multi-turn flows like human rep request
-        if human_rep_step and human_rep_step not in [STATE_ASK_NAME, STATE_COMPLETE]:
-            logger.info(f"Human representative flow active (Step: {human_rep_step}). Routing directly to HumanRepAgent.")
+        if human_rep_step and human_rep_step not in HUMAN_REP_IDLE_STEPS:
+            logger.info("Human representative flow active (Step: %s). Routing directly to HumanRepAgent.", human_rep_step)
             intent = "request_human" # Force intent
-            selected_agent = self.agents.get(intent)
-            state.update_state(intent=intent) # Ensure intent is set for this turn
+            intent_id = Intent.REQUEST_HUMAN
+            selected_agent = self._agent_table[intent_id]
+            state.update_state(intent=intent, now=now) # Ensure intent is set for this turn
         else:
-            # If no specific flow active, determine intent
-            logger.debug("Determining intent using LLM service...")
-            # Use determine_intent which might be simpler than determine_intent_and_entities
-            # determine_intent is synchronous, so no await needed
-            detected_intent = self.llm_service.determine_intent(
-                user_input=user_input,
-                available_intents=self.intents,
-                history=state.get_history() # Provide history for context
-            )
-            logger.info(f"Detected intent: '{detected_intent}'")
-            state.update_state(intent=detected_intent) # Store detected intent in state
+            # If no specific flow active, determine intent (obvious inputs skip the LLM entirely)
+            detected_intent = _quick_intent(user_input)
+            if detected_intent is not None:
+                logger.info("Detected intent without LLM: '%s'", detected_intent)
+            else:
+                logger.debug("Determining intent using LLM service...")
+                # Await the async variant so other sessions stay responsive while we wait for the LLM
+                detected_intent = await self.llm_service.adetermine_intent(
+                    user_input=user_input,
+                    available_intents=self.intents,
+                    history=state.get_history() # Provide history for context
+                )
+                logger.info("Detected intent: '%s'", detected_intent)
+            state.update_state(intent=detected_intent, now=now) # Store detected intent in state
             intent = detected_intent # Use the detected intent
 
-            # Select agent based on intent
-            selected_agent = self.agents.get(intent)
-
-        # --- Execute Agent or Default Response ---
-        bot_response: str
-
+            # Select agent based on intent (unrecognised intents fall through to the default response)
+            intent_id = INTENT_BY_NAME.get(intent)
+            if intent_id is not None:
+                selected_agent = self._agent_table[intent_id]
+
+        return state, now, selected_agent, intent, intent_id
+
+    async def _agent_response(
+        self,
+        state: ConversationState,
+        user_input: str,
+        now: datetime,
+        selected_agent: Optional[BaseAgent],
+        intent: Optional[str],
+        intent_id: Optional[Intent]
+    ) -> str:
+        """Runs the selected agent, or returns the default response when nothing handles the intent."""
         if selected_agent:
-            logger.info(f"Routing to agent: {selected_agent.agent_name}")
+            logger.info("Routing to agent: %s", selected_agent.agent_name)
             try:
                 # Pass relevant state and input to the agent
                 bot_response = await selected_agent.process(state=state, user_input=user_input)
-                state.update_state(agent=selected_agent.agent_name) # Record which agent handled it
-                logger.debug(f"Agent '{selected_agent.agent_name}' response: '{bot_response[:100]}...'")
+                state.update_state(agent=selected_agent.agent_name, now=now) # Record which agent handled it
+                logger.debug("Agent '%s' response: '%.100s...'", selected_agent.agent_name, bot_response)
             except Exception as e:
-                logger.error(f"Error processing message with agent {selected_agent.agent_name}: {e}", exc_info=True)
-                bot_response = "I'm sorry, I encountered an error trying to handle your request. Could you please try rephrasing?"
+                logger.error("Error processing message with agent %s: %s", selected_agent.agent_name, e, exc_info=True)
+                bot_response = RESPONSE_AGENT_ERROR
                 # Optionally reset specific state if agent failed mid-flow
-                if intent == "request_human":
-                     state.extracted_entities.pop(KEY_HUMAN_REP_STEP, None) # Reset human rep flow on error
-
-        elif intent == 'general_query' or intent == 'unknown':
-            logger.info("Handling as general query using LLM.")
-            # Use the LLM's general generation capability
-            bot_response = self.llm_service.generate_response( # generate_response is synchronous
-                prompt=user_input, # Pass user input directly
-                history=state.get_history() # Provide history
-            )
-            state.update_state(agent='llm_general_response')
-        else:
-            # This case should ideally not happen if intents cover all agents + general/unknown
-            logger.warning(f"No agent found for intent '{intent}' and not general/unknown. Providing default response.")
-            bot_response = "I'm sorry, I'm not sure how to handle that specific request. Can I help with order status, return policies, or connecting you to a human representative?"
-            state.update_state(agent='fallback_response')
+                if intent_id is Intent.REQUEST_HUMAN:
+                     _reset_human_rep_flow(state)
+            return bot_response
 
+        # This case should ideally not happen if intents cover all agents + general/unknown
+        logger.warning("No agent found for intent '%s' and not general/unknown. Providing default response.", intent)
+        state.update_state(agent='fallback_response', now=now)
+        return RESPONSE_NO_HANDLER
 
+    def _finish_turn(self, state: ConversationState, bot_response: str, now: datetime) -> Dict[str, str]:
+        """Records the bot response and builds the reply returned to the UI."""
         # Add bot response to state
-        state.add_message(role="model", text=bot_response)
+        state.add_message(role="model", text=bot_response, now=now)
 
         # Clean up transient state elements if needed (e.g., intent for the *next* turn)
         # state.clear_transient_state() # Decide if this is needed
 
-        logger.info(f"Final response for session {session_id}: '{bot_response[:100]}...'")
+        logger.info("Final response for session %s: '%.100s...'", state.session_id, bot_response)
 
         # Return response and session ID
-        return {"response": bot_response, "session_id": session_id}
+        return {"response": bot_response, "session_id": state.session_id}
 
     # --- Optional: Cleanup method ---
     def cleanup_inactive_sessions(self, max_age_seconds: int = 3600):
         """Removes conversation states that haven't been active for a while."""
-        now = datetime.now() # Use datetime.datetime.now()
-        inactive_sessions = [
-            sid for sid, state in self.conversation_states.items()
-            if (now - state.last_interaction_time).total_seconds() > max_age_seconds
-        ]
-        if inactive_sessions:
-            logger.info(f"Cleaning up {len(inactive_sessions)} inactive sessions older than {max_age_seconds} seconds.")
-            for sid in inactive_sessions:
-                del self.conversation_states[sid]
\ No newline at end of file
+        cutoff = datetime.now() - timedelta(seconds=max_age_seconds)
+        # Sessions are kept in recency order, so stop at the first one that is still active
+        removed = 0
+        while self.conversation_states:
+            oldest_state = next(iter(self.conversation_states.values()))
+            if oldest_state.last_interaction_time >= cutoff:
+                break
+            self.conversation_states.popitem(last=False)
+            removed += 1
+        if removed:
+            logger.info("Cleaned up %s inactive sessions older than %s seconds.", removed, max_age_seconds)
\ No newline at end of file
@@ -1,60 +1,79 @@
 # src/core/state.py
-from typing import List, Dict, Optional, Any
-# Import ConfigDict for Pydantic v2 config
-from pydantic import BaseModel, Field, ConfigDict
+import sys
+from collections import deque
+from dataclasses import dataclass, field
+from typing import List, Dict, Optional, Any, Deque
 import datetime
+from src.core.config import MAX_CONVERSATION_HISTORY
 
-class ConversationState(BaseModel):
+# Interned role names so every stored message shares the same string objects
+ROLE_USER = sys.intern("user")
+ROLE_MODEL = sys.intern("model")
+_ROLES = {ROLE_USER: ROLE_USER, ROLE_MODEL: ROLE_MODEL}
+
+
+@dataclass(slots=True)
+class Message:
+    """A single history entry, stored compactly instead of as a nested dict."""
+    role: str
+    text: str
+
+    def to_content(self) -> Dict[str, Any]:
+        """Returns the message in Gemini content format."""
+        return {"role": self.role, "parts": [self.text]}
+
+
+@dataclass(slots=True)
+class ConversationState:
     """Represents the state of a conversation."""
-    session_id: str = Field(..., description="Unique identifier for the conversation session.")
-    history: List[Dict[str, str]] = Field(default_factory=list, description="History of user/model messages.")
-    # Example: [{'role': 'user', 'parts': ['Hi there!']}, {'role': 'model', 'parts': ['Hello! How can I help?']}]
-
-    current_intent: Optional[str] = Field(None, description="The detected intent for the current turn.")
-    last_agent: Optional[str] = Field(None, description="The last agent that handled the conversation.")
-    extracted_entities: Dict[str, Any] = Field(default_factory=dict, description="Entities extracted during the conversation (e.g., {'order_id': 'xyz'}).")
-    last_interaction_time: datetime.datetime = Field(default_factory=datetime.datetime.now, description="Timestamp of the last interaction.")
-
-    # --- Pydantic V2 Configuration ---
-    model_config = ConfigDict(
-        # Allows Pydantic models to work with ORM objects if needed later
-        # For now, primarily useful for validation on assignment
-        from_attributes=True,
-        # Optional: Add other configurations like validate_assignment if needed
-        # validate_assignment=True
-    )
-
-    def add_message(self, role: str, text: str):
-        """Adds a message to the history."""
-        # Basic validation
-        if role not in ['user', 'model']:
+    session_id: str  # Unique identifier for the conversation session.
+    # Bounded deque: appends are O(1) and the oldest message is evicted automatically
+    history: Deque[Message] = field(default_factory=lambda: deque(maxlen=MAX_CONVERSATION_HISTORY))
+    # Example: [Message('user', 'Hi there!'), Message('model', 'Hello! How can I help?')]; see get_history() for the Gemini format
+
+    current_intent: Optional[str] = None  # The detected intent for the current turn.
+    last_agent: Optional[str] = None  # The last agent that handled the conversation.
+    # Entities extracted during the conversation (e.g., {'order_id': 'xyz'}).
+    extracted_entities: Dict[str, Any] = field(default_factory=dict)
+    last_interaction_time: datetime.datetime = field(default_factory=datetime.datetime.now)
+    # Gemini-format history built by get_history(); reset whenever a message is added
+    _history_cache: Optional[List[Dict[str, Any]]] = field(default=None, init=False, repr=False, compare=False)
+
+    def add_message(self, role: str, text: str, now: Optional[datetime.datetime] = None):
+        """Adds a message to the history. Pass `now` to reuse a timestamp already taken this turn."""
+        # Basic validation (also maps the role onto its interned string)
+        interned_role = _ROLES.get(role)
+        if interned_role is None:
             raise ValueError("Role must be 'user' or 'model'")
         if not isinstance(text, str):
             raise TypeError("Text must be a string")
 
-        self.history.append({"role": role, "parts": [text]})
-        self.last_interaction_time = datetime.datetime.now()
+        self.history.append(Message(interned_role, text))
+        self._history_cache = None
+        self.last_interaction_time = now or datetime.datetime.now()
 
-    def get_history(self) -> List[Dict[str, str]]:
-        """Returns the conversation history."""
-        return self.history
+    def get_history(self) -> List[Dict[str, Any]]:
+        """
+        Returns the conversation history as a list (the format the LLM client expects).
+        The list is shared until the next add_message(), so callers must not mutate it.
+        """
+        if self._history_cache is None:
+            self._history_cache = [message.to_content() for message in self.history]
+        return self._history_cache
 
-    def update_state(self, intent: Optional[str] = None, agent: Optional[str] = None, entities: Optional[Dict[str, Any]] = None):
-        """Updates the state after processing a turn."""
+    def update_state(self, intent: Optional[str] = None, agent: Optional[str] = None, entities: Optional[Dict[str, Any]] = None,
+                     now: Optional[datetime.datetime] = None):
+        """Updates the state after processing a turn. Pass `now` to reuse a timestamp already taken this turn."""
         if intent is not None:
             self.current_intent = intent
         if agent is not None:
             self.last_agent = agent
         if entities is not None:
             self.extracted_entities.update(entities) # Merge new entities
-        self.last_interaction_time = datetime.datetime.now()
+        self.last_interaction_time = now or datetime.datetime.now()
 
     def clear_transient_state(self):
         """Resets state elements that might be turn-specific."""
         self.current_intent = None
         # Decide if extracted_entities should persist across turns or be cleared
         # self.extracted_entities = {} # Uncomment if entities should reset each turn
-
-    # --- Removed old class Config ---
-    # class Config:
-    #     from_attributes = True
\ No newline at end of file
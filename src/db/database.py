@@ -1,10 +1,10 @@
 # src/db/database.py
 import os
 import logging
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
 # Import the CORRECT variable name and other needed config
-from src.core.config import SQLALCHEMY_DATABASE_URL, DATA_DIR # Removed SQLALCHEMY_ECHO if not used here
+from src.core.config import SQLALCHEMY_DATABASE_URL, DATA_DIR, DB_POOL_SIZE, DB_MAX_OVERFLOW # Removed SQLALCHEMY_ECHO if not used here
 
 logger = logging.getLogger(__name__)
 
@@ -14,7 +14,7 @@ if SQLALCHEMY_DATABASE_URL.startswith("sqlite:///"):
     db_path = SQLALCHEMY_DATABASE_URL.split("///")[1]
     db_dir = os.path.dirname(db_path)
     if db_dir and not os.path.exists(db_dir):
-        logger.info(f"Creating database directory: {db_dir}")
+        logger.info("Creating database directory: %s", db_dir)
         os.makedirs(db_dir, exist_ok=True)
     # Also ensure the base DATA_DIR exists (if db is inside it)
     if not os.path.exists(DATA_DIR):
@@ -22,18 +22,42 @@ if SQLALCHEMY_DATABASE_URL.startswith("sqlite:///"):
 
 
 try:
-    logger.info(f"Attempting to create engine for database: {SQLALCHEMY_DATABASE_URL}")
+    logger.info("Attempting to create engine for database: %s", SQLALCHEMY_DATABASE_URL)
     # Use the correct variable name here
     engine = create_engine(
         SQLALCHEMY_DATABASE_URL,
-        connect_args={"check_same_thread": False} if SQLALCHEMY_DATABASE_URL.startswith("sqlite") else {}
+        connect_args={"check_same_thread": False} if SQLALCHEMY_DATABASE_URL.startswith("sqlite") else {},
+        # Keep enough pooled connections that concurrent lookups never wait on checkout
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
         # Removed echo=SQLALCHEMY_ECHO unless you define and import SQLALCHEMY_ECHO in config.py
     )
-    logger.info(f"SQLAlchemy engine created successfully for: {SQLALCHEMY_DATABASE_URL.split('///')[-1]}")
+    logger.info("SQLAlchemy engine created successfully for: %s", SQLALCHEMY_DATABASE_URL.split('///')[-1])
 except Exception as e:
-    logger.error(f"Failed to create SQLAlchemy engine: {e}", exc_info=True)
+    logger.error("Failed to create SQLAlchemy engine: %s", e, exc_info=True)
     raise
 
+# SQLite connection tuning: WAL lets order lookups read while contact requests are written,
+# and NORMAL sync is safe under WAL while avoiding an fsync on every commit
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",  # 256 MiB
+    "PRAGMA cache_size=-65536",  # 64 MiB
+)
+
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """Applies SQLITE_PRAGMAS to every new pooled connection."""
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in SQLITE_PRAGMAS:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 logger.info("SQLAlchemy SessionLocal created.")
 
@@ -56,4 +80,4 @@ def init_db():
         Base.metadata.create_all(bind=engine)
         logger.info("Database tables initialized successfully.")
     except Exception as e:
-        logger.error(f"Failed to initialize database tables: {e}", exc_info=True)
\ No newline at end of file
+        logger.error("Failed to initialize database tables: %s", e, exc_info=True)
\ No newline at end of file
@@ -1,7 +1,6 @@
 # src/db/models.py
-import datetime
-from sqlalchemy import Column, String, DateTime, Integer, Text
-from sqlalchemy.orm import declarative_base
+from sqlalchemy import Column, String, DateTime, Integer, Text, func
+from sqlalchemy.orm import declarative_base, deferred
 from src.db.database import Base
 from src.core.config import ORDERS_TABLE_NAME, CONTACTS_TABLE_NAME
 
@@ -9,16 +8,18 @@ class Order(Base):
     """SQLAlchemy model for orders."""
     __tablename__ = ORDERS_TABLE_NAME
 
-    # Assuming order_id is the unique identifier
-    order_id = Column(String(32), primary_key=True, index=True)
+    # Assuming order_id is the unique identifier (the primary key is already indexed)
+    order_id = Column(String(32), primary_key=True)
     customer_id = Column(String(32), index=True) # Index for potential lookups
     order_status = Column(String(50))
 
     # Use DateTime for timestamp fields
     # Ensure the CSV loading handles date parsing correctly
     order_purchase_timestamp = Column(DateTime, nullable=True)
-    order_approved_at = Column(DateTime, nullable=True)
-    order_delivered_carrier_date = Column(DateTime, nullable=True)
+    # Never shown to customers, so leave them out of the SELECT and load on access only.
+    # Don't read these after the session closes (OrderService closes it before formatting).
+    order_approved_at = deferred(Column(DateTime, nullable=True))
+    order_delivered_carrier_date = deferred(Column(DateTime, nullable=True))
     order_delivered_customer_date = Column(DateTime, nullable=True)
     order_estimated_delivery_date = Column(DateTime, nullable=True)
 
@@ -32,12 +33,12 @@ class ContactRequest(Base):
     """SQLAlchemy model for storing human representative contact requests."""
     __tablename__ = CONTACTS_TABLE_NAME
 
-    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    id = Column(Integer, primary_key=True, autoincrement=True) # Rowid alias, no extra index needed
     full_name = Column(String(255), nullable=False)
     email = Column(String(255), nullable=False, index=True) # Index for potential lookups
     phone_number = Column(String(50), nullable=True) # Allow phone to be optional maybe?
-    # This is CORRECT
-    request_timestamp = Column(DateTime, default=datetime.datetime.now(datetime.timezone.utc))
+    # Filled in by the database per row (CURRENT_TIMESTAMP, UTC on SQLite)
+    request_timestamp = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     notes = Column(Text, nullable=True) # Optional field for context
 
     def __repr__(self):
@@ -2,13 +2,12 @@
 import pandas as pd
 import logging
 import os
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from src.db.database import engine, Base, SessionLocal
 from src.db.models import Order, ContactRequest # Import all models
-from src.core.config import ORDERS_CSV_PATH, ORDERS_TABLE_NAME, DATA_DIR
-import numpy as np # Import numpy
+from src.core.config import ORDERS_CSV_PATH, ORDERS_TABLE_NAME, DATA_DIR, setup_logging
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 def create_tables():
@@ -18,113 +17,137 @@ def create_tables():
         # Ensure the directory for the database exists
         db_dir = os.path.dirname(os.path.abspath(engine.url.database))
         os.makedirs(db_dir, exist_ok=True)
-        logger.info(f"Ensured database directory exists: {db_dir}")
+        logger.info("Ensured database directory exists: %s", db_dir)
 
         Base.metadata.create_all(bind=engine)
         logger.info("Database tables created successfully (if they didn't exist).")
-        logger.info(f"Tables created: {Base.metadata.tables.keys()}")
+        logger.info("Tables created: %s", Base.metadata.tables.keys())
     except Exception as e:
-        logger.error(f"Error creating database tables: {e}", exc_info=True)
+        logger.error("Error creating database tables: %s", e, exc_info=True)
         raise
 
+# --- CSV Loading Settings ---
+ORDER_DATE_COLUMNS = (
+    'order_purchase_timestamp',
+    'order_approved_at',
+    'order_delivered_carrier_date',
+    'order_delivered_customer_date',
+    'order_estimated_delivery_date'
+)
+CSV_NA_VALUES = ['', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'n/a', 'nan', 'null']
+CSV_CHUNK_SIZE = 20_000 # Rows parsed and inserted per batch
+ORDER_DATE_FORMAT = '%d/%m/%Y %H:%M' # Day-first timestamps as exported in cached_orders.csv
+
+# Column names of the Order model, built once for O(1) membership checks
+ORDER_MODEL_COLUMNS = frozenset(c.name for c in Order.__table__.columns)
+
+def _select_model_columns(csv_columns):
+    """Returns the CSV columns that map onto the Order model, warning about any mismatch."""
+    columns_to_load = [col for col in csv_columns if col in ORDER_MODEL_COLUMNS]
+    if len(columns_to_load) < len(ORDER_MODEL_COLUMNS):
+         missing_cols = ORDER_MODEL_COLUMNS.difference(columns_to_load)
+         logger.warning("CSV is missing columns defined in the Order model: %s", missing_cols)
+    if len(csv_columns) > len(columns_to_load):
+         extra_cols = set(csv_columns) - set(columns_to_load)
+         logger.warning("CSV has extra columns not in the Order model (will be ignored): %s", extra_cols)
+    for col in ORDER_DATE_COLUMNS:
+        if col not in csv_columns:
+            logger.warning("Date column '%s' not found in CSV.", col)
+    logger.info("Loading model columns from CSV: %s", columns_to_load)
+    return columns_to_load
+
+def _clean_orders_chunk(df: pd.DataFrame) -> dict:
+    """Parses the date columns of one CSV chunk and turns every null form into None, column by column."""
+    cleaned = {}
+    for col in df.columns:
+        values = df[col]
+        if col in ORDER_DATE_COLUMNS:
+            # A fixed format keeps every chunk on pandas' fast path instead of re-inferring it per chunk
+            values = pd.to_datetime(values, format=ORDER_DATE_FORMAT, errors='coerce')
+            # Plain datetime objects are about twice as cheap to build as Timestamps and bind the same way
+            column = values.array.to_pydatetime()
+        else:
+            column = values.to_numpy(dtype=object, copy=True)
+        # Null strings were already turned into NaN by na_values, and unparseable dates into NaT;
+        # one mask per column swaps both for the None SQLAlchemy needs (no frame-wide replace pass).
+        # Kept as object arrays: a DataFrame would infer datetime64 again and bring NaT back.
+        column[values.isna().to_numpy()] = None
+        cleaned[col] = column
+    return cleaned
+
+def _columns_to_records(columns: dict) -> list:
+    """Builds one dict per row by zipping whole columns; several times faster than to_dict('records')."""
+    names = list(columns)
+    return [dict(zip(names, row)) for row in zip(*(columns[name].tolist() for name in names))]
+
 def load_orders_from_csv(db: Session):
     """Loads order data from CSV into the database, checking for existing data."""
-    logger.info(f"Checking if data needs to be loaded from {ORDERS_CSV_PATH} into table '{ORDERS_TABLE_NAME}'...")
+    logger.info("Checking if data needs to be loaded from %s into table '%s'...", ORDERS_CSV_PATH, ORDERS_TABLE_NAME)
 
     try:
-        # Check if the table already has data
-        order_count = db.query(Order).count()
-        if order_count > 0:
-            logger.info(f"Table '{ORDERS_TABLE_NAME}' already contains {order_count} records. Skipping CSV load.")
+        # Check if the table already has data (probing for one row is enough; no need to count them all)
+        if db.execute(select(Order.order_id).limit(1)).first() is not None:
+            logger.info("Table '%s' already contains data. Skipping CSV load.", ORDERS_TABLE_NAME)
             return
 
-        logger.info(f"Table '{ORDERS_TABLE_NAME}' is empty. Attempting to load data from CSV...")
+        logger.info("Table '%s' is empty. Attempting to load data from CSV...", ORDERS_TABLE_NAME)
 
         if not os.path.exists(ORDERS_CSV_PATH):
-            logger.error(f"CSV file not found at {ORDERS_CSV_PATH}. Cannot load orders.")
+            logger.error("CSV file not found at %s. Cannot load orders.", ORDERS_CSV_PATH)
             return
 
-        # Define date columns for parsing
-        date_columns = [
-            'order_purchase_timestamp',
-            'order_approved_at',
-            'order_delivered_carrier_date',
-            'order_delivered_customer_date',
-            'order_estimated_delivery_date'
-        ]
+        # Only columns that exist in the Order model are inserted (see _select_model_columns)
+        insert_orders = Order.__table__.insert()
+        columns_to_load = None
+        total_loaded = 0
 
-        # --- Robust CSV Reading and Cleaning ---
+        # --- Robust CSV Reading and Cleaning (chunked, so only one chunk is in memory at a time) ---
         try:
-            # Step 1: Read all columns as strings initially to prevent incorrect type inference.
+            # Read all columns as strings initially to prevent incorrect type inference.
             # Use keep_default_na=False and specify na_values to control NaN interpretation.
-            df = pd.read_csv(
+            chunks = pd.read_csv(
                 ORDERS_CSV_PATH,
                 dtype=str, # Read everything as string first
                 keep_default_na=False, # Don't use default NaN interpretation
-                na_values=['', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'n/a', 'nan', 'null'] # Define strings to treat as NaN
+                na_values=CSV_NA_VALUES, # Strings to treat as NaN
+                chunksize=CSV_CHUNK_SIZE
             )
-            logger.info(f"Successfully read {len(df)} rows from {ORDERS_CSV_PATH} (initially as strings).")
-
-            # Step 2: Convert specific columns to datetime, coercing errors to NaT.
-            for col in date_columns:
-                if col in df.columns:
-                    df[col] = pd.to_datetime(df[col], errors='coerce', dayfirst=True) # Keep dayfirst=True
-                    logger.debug(f"Converted column '{col}' to datetime (errors coerced to NaT).")
-                else:
-                    logger.warning(f"Date column '{col}' not found in CSV.")
-
-            # Step 3: Replace all forms of null/NaN (including pandas NaT) with Python None.
-            # This is crucial for SQLAlchemy compatibility.
-            # Replace numpy NaN (just in case, though dtype=str should prevent float columns)
-            df = df.replace({np.nan: None})
-            # Replace pandas NaT (for datetimes)
-            df = df.replace({pd.NaT: None})
-            # Replace any remaining specified na_values (which were read as strings) with None
-            for na_val in ['', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'n/a', 'nan', 'null']:
-                 df = df.replace({na_val: None})
-
-            logger.info("Replaced NaT and various null/NaN representations with Python None.")
-
         except Exception as e:
-            logger.error(f"Error reading or processing CSV file {ORDERS_CSV_PATH}: {e}", exc_info=True)
+            logger.error("Error reading CSV file %s: %s", ORDERS_CSV_PATH, e, exc_info=True)
             return
-        # --- End Robust CSV Reading ---
-
-
-        # Select only columns that exist in the Order model to avoid inserting extra columns
-        model_columns = [c.name for c in Order.__table__.columns]
-        df_columns_to_load = [col for col in df.columns if col in model_columns]
-        if len(df_columns_to_load) < len(model_columns):
-             missing_cols = set(model_columns) - set(df_columns_to_load)
-             logger.warning(f"CSV is missing columns defined in the Order model: {missing_cols}")
-        if len(df.columns) > len(df_columns_to_load):
-             extra_cols = set(df.columns) - set(df_columns_to_load)
-             logger.warning(f"CSV has extra columns not in the Order model (will be ignored): {extra_cols}")
-
-        df_filtered = df[df_columns_to_load]
-        logger.info(f"Filtered DataFrame to include only model columns: {df_columns_to_load}")
-
-
-        # Convert DataFrame to list of dictionaries
-        orders_data = df_filtered.to_dict(orient='records')
-
-        # Bulk insert using SQLAlchemy Core
-        if orders_data:
-             # Debug: Log the first record and its types just before insertion
-            if orders_data:
-                sample_record = orders_data[0]
-                logger.debug(f"Sample record data before insert: {sample_record}")
-                logger.debug(f"Types in sample record: {{k: type(v) for k, v in sample_record.items()}}")
 
-            logger.info(f"Attempting bulk insert of {len(orders_data)} records...")
-            db.bulk_insert_mappings(Order, orders_data)
+        while True:
+            try:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                if columns_to_load is None:
+                    columns_to_load = _select_model_columns(chunk.columns)
+                orders_data = _columns_to_records(_clean_orders_chunk(chunk[columns_to_load]))
+            except Exception as e:
+                logger.error("Error reading or processing CSV file %s: %s", ORDERS_CSV_PATH, e, exc_info=True)
+                db.rollback() # Discard chunks inserted before the bad one
+                return
+
+            if not orders_data:
+                continue
+            if total_loaded == 0:
+                logger.debug("Sample record data before insert: %s", orders_data[0])
+            # Core executemany on the table skips the ORM bulk layer entirely; every record
+            # carries the same keys, so each chunk goes to the driver as one batch
+            db.execute(insert_orders, orders_data)
+            total_loaded += len(orders_data)
+            logger.debug("Inserted %s orders so far...", total_loaded)
+
+        if total_loaded:
+            # One commit for the whole file, so a failed load never leaves a partial table
             db.commit()
-            logger.info(f"Successfully loaded {len(orders_data)} orders into the database.")
+            logger.info("Successfully loaded %s orders into the database.", total_loaded)
         else:
             logger.info("No order data found in the CSV to load.")
 
     except Exception as e:
-        logger.error(f"Error during database operation: {e}", exc_info=True) # Changed logging message slightly
+        logger.error("Error during database operation: %s", e, exc_info=True) # Changed logging message slightly
         db.rollback() # Rollback in case of error during commit
         raise
     finally:
@@ -134,13 +157,13 @@ def load_orders_from_csv(db: Session):
 # --- Main execution block ---
 if __name__ == "__main__":
     # Configure logging specifically for standalone execution
-    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    setup_logging()
     logger.info("--- Database Setup Script Started (Standalone Execution) ---")
 
     # Ensure data directory exists (redundant if config does it, but safe)
     if not os.path.exists(DATA_DIR):
         os.makedirs(DATA_DIR)
-        logger.info(f"Created data directory: {DATA_DIR}")
+        logger.info("Created data directory: %s", DATA_DIR)
 
     create_tables() # Create tables first
 
@@ -149,7 +172,7 @@ if __name__ == "__main__":
     try:
         load_orders_from_csv(db=db_session) # Load data using the session
     except Exception as e:
-        logger.error(f"An error occurred during the setup process: {e}")
+        logger.error("An error occurred during the setup process: %s", e)
     finally:
         db_session.close() # Ensure the session is closed
         logger.info("--- Database Setup Script Finished (Standalone Execution) ---")
\ No newline at end of file
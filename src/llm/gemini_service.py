@@ -1,7 +1,9 @@
 # src/llm/gemini_service.py
 import google.generativeai as genai
 import logging
-from typing import List, Dict, Optional, Any
+from collections import OrderedDict
+from functools import lru_cache
+from typing import List, Dict, Optional, Any, Tuple, Iterator, AsyncIterator
 from src.llm.interface import LLMInterface
 from src.core.config import (
     GOOGLE_API_KEY,
@@ -15,6 +17,62 @@ from src.core.config import (
 
 logger = logging.getLogger(__name__)
 
+# Deletes quote characters the LLM sometimes wraps around the intent name (single C-level pass)
+INTENT_QUOTES_TABLE = str.maketrans("", "", "'\"")
+# Intent classification settings: low temperature, and an intent name is short
+INTENT_TEMPERATURE = 0.1
+INTENT_MAX_OUTPUT_TOKENS = 20
+# Recognised intents remembered per normalized message, so repeats ("hi", "thanks") skip the API
+INTENT_CACHE_SIZE = 1024
+
+
+@lru_cache(maxsize=8)
+def _intent_lookup(available_intents: Tuple[str, ...]) -> Dict[str, str]:
+    """Maps lower-cased intent names (plus 'general_query') to their original spelling."""
+    return {intent.lower(): intent for intent in available_intents + ('general_query',)}
+
+
+@lru_cache(maxsize=8)
+def _intent_prompt_template(available_intents: Tuple[str, ...]) -> str:
+    """Builds the intent detection prompt once per intent set, leaving a {user_input} placeholder."""
+    intent_list_str = ", ".join([f"'{intent}'" for intent in available_intents])
+    return f"""
+Analyze the following user message and determine the primary intent.
+The available intents are: {intent_list_str}, 'general_query'.
+
+User Message: "{{user_input}}"
+
+Based *only* on the user message and the available intents, which intent best describes the user's goal?
+Respond with *only* the single intent name from the list (e.g., 'check_order_status', 'ask_return_policy', 'request_human', 'general_query').
+Do not add any explanation or other text.
+Intent:"""
+
+
+def _build_contents(history: List[Dict[str, Any]], prompt: str) -> List[Dict[str, Any]]:
+    """Returns the request contents: the prior turns followed by the new user prompt."""
+    return [*history, {"role": "user", "parts": [prompt]}]
+
+
+def _normalize_input(user_input: str) -> str:
+    """Folds case and runs of whitespace so trivially different messages share a cache entry."""
+    return ' '.join(user_input.lower().split())
+
+
+def _parse_intent(raw_intent: str, available_intents: Tuple[str, ...]) -> Optional[str]:
+    """Maps the model's raw classification onto one of the available intents, or None if unrecognized."""
+    # Clean up the response - LLM might add quotes or extra spaces
+    cleaned_intent = raw_intent.translate(INTENT_QUOTES_TABLE).strip().lower()
+
+    # Validate against available intents, returning the original casing if matched
+    original_intent = _intent_lookup(available_intents).get(cleaned_intent)
+    if original_intent:
+        logger.info("Determined intent: '%s'", original_intent)
+        return original_intent
+
+    logger.warning("LLM returned unrecognized intent '%s' (cleaned: '%s'). Defaulting to 'general_query'.", raw_intent, cleaned_intent)
+    return None
+
+
 class GeminiService(LLMInterface):
     """Implementation of LLMInterface using Google's Gemini models."""
 
@@ -45,16 +103,67 @@ class GeminiService(LLMInterface):
                 # Add the system instruction here
                 system_instruction=SYSTEM_PROMPT
             )
-            logger.info(f"Gemini model '{GEMINI_MODEL_NAME}' initialized successfully.")
-            logger.debug(f"Gemini Config: Temp={GEMINI_TEMPERATURE}, MaxTokens={GEMINI_MAX_OUTPUT_TOKENS}, TopP={GEMINI_TOP_P}, TopK={GEMINI_TOP_K}")
-            logger.debug(f"Gemini System Prompt: {SYSTEM_PROMPT[:100]}...") # Log beginning of prompt
+            # Per-request generation config overrides, keyed by (temperature, max_output_tokens)
+            self._config_overrides: Dict[Tuple[Optional[float], Optional[int]], Dict[str, Any]] = {}
+            # LRU of recognised intents, keyed by (normalized input, available intents)
+            self._intent_cache: "OrderedDict[Tuple[str, Tuple[str, ...]], str]" = OrderedDict()
+            logger.info("Gemini model '%s' initialized successfully.", GEMINI_MODEL_NAME)
+            logger.debug("Gemini Config: Temp=%s, MaxTokens=%s, TopP=%s, TopK=%s", GEMINI_TEMPERATURE, GEMINI_MAX_OUTPUT_TOKENS, GEMINI_TOP_P, GEMINI_TOP_K)
+            logger.debug("Gemini System Prompt: %.100s...", SYSTEM_PROMPT) # Log beginning of prompt
 
         except Exception as e:
-            logger.error(f"Failed to initialize Gemini model: {e}", exc_info=True)
+            logger.error("Failed to initialize Gemini model: %s", e, exc_info=True)
             # Depending on the application, you might want to raise the error
             # or handle it gracefully (e.g., set self.model to None and check later)
             raise ConnectionError(f"Failed to initialize Gemini: {e}") from e
 
+    def _get_generation_config_override(
+        self,
+        temperature: Optional[float],
+        max_output_tokens: Optional[int]
+    ) -> Optional[Dict[str, Any]]:
+        """Returns a per-request generation config override, or None to use the model's default."""
+        if temperature is None and max_output_tokens is None:
+            return None
+
+        # Overrides are read-only once built, so reuse them across calls
+        cache_key = (temperature, max_output_tokens)
+        cached_override = self._config_overrides.get(cache_key)
+        if cached_override is not None:
+            return cached_override
+
+        # generate_content accepts a dict for generation_config overrides
+        config_override_dict = {
+            "temperature": temperature if temperature is not None else self.generation_config.temperature,
+            "max_output_tokens": max_output_tokens if max_output_tokens is not None else self.generation_config.max_output_tokens,
+            "top_p": self.generation_config.top_p, # Keep others from default
+            "top_k": self.generation_config.top_k
+        }
+        logger.debug("Built generation config override: %s", config_override_dict)
+        self._config_overrides[cache_key] = config_override_dict
+        return config_override_dict
+
+    def _response_text(self, response) -> str:
+        """Extracts the reply text from a Gemini response, mapping blocked/empty responses to a message."""
+        # Check for potential safety blocks or empty responses
+        if not response.parts:
+            logger.warning("Gemini response blocked or empty. Check safety settings or prompt.")
+            # Check candidate details if available
+            try:
+                finish_reason = response.candidates[0].finish_reason.name
+                safety_ratings = response.candidates[0].safety_ratings
+                logger.warning("Finish Reason: %s", finish_reason)
+                logger.warning("Safety Ratings: %s", safety_ratings)
+                if finish_reason == "SAFETY":
+                    return "I cannot provide a response to that request due to safety guidelines."
+            except (IndexError, AttributeError) as e:
+                logger.warning("Could not retrieve detailed block reason: %s", e)
+            return "I'm sorry, I couldn't generate a response for that."
+
+        response_text = response.text
+        logger.debug("Received response from Gemini: '%.100s...'", response_text)
+        return response_text
+
     def generate_response(
         self,
         prompt: str, # In conversational use, this might be the latest user message
@@ -82,67 +191,171 @@ class GeminiService(LLMInterface):
         # Use the history provided, or start fresh if none
         chat_history = history or []
 
-        # Create a chat session *for this specific request* using the history
-        # Note: Gemini API manages history state within the session object if you reuse it,
-        # but passing history explicitly like this is often clearer for stateless web apps.
-        # Moved inside try block
-
         # Prepare generation config overrides if any
-        current_gen_config = self.generation_config
-        if temperature is not None or max_output_tokens is not None:
-             # Create a temporary config dictionary for overrides
-             config_override_dict = {
-                 "temperature": temperature if temperature is not None else self.generation_config.temperature,
-                 "max_output_tokens": max_output_tokens if max_output_tokens is not None else self.generation_config.max_output_tokens,
-                 "top_p": self.generation_config.top_p, # Keep others from default
-                 "top_k": self.generation_config.top_k
-             }
-             # Convert dict to GenerationConfig object if necessary for send_message
-             # Note: send_message might accept a dict directly for generation_config override
-             # Check google-generativeai documentation for the exact expected type.
-             # Assuming send_message accepts a dict for overrides:
-             generation_config_override = config_override_dict
-             logger.debug(f"Using generation config override: {generation_config_override}")
-        else:
-             generation_config_override = None # Use model's default
-
+        generation_config_override = self._get_generation_config_override(temperature, max_output_tokens)
 
         try:
-            # Start the chat session *inside* the try block
-            chat_session = self.model.start_chat(history=chat_history)
-            logger.debug(f"Sending prompt to Gemini: '{prompt[:100]}...' with history length: {len(chat_history)}")
-            # Send the new prompt to the chat session
-            response = chat_session.send_message(
-                prompt,
+            logger.debug("Sending prompt to Gemini: '%.100s...' with history length: %s", prompt, len(chat_history))
+            # Stateless call: send history + prompt directly instead of building a ChatSession per request
+            response = self.model.generate_content(
+                _build_contents(chat_history, prompt),
                 generation_config=generation_config_override # Pass overrides if any
             )
 
-            # Check for potential safety blocks or empty responses
-            if not response.parts:
-                 logger.warning("Gemini response blocked or empty. Check safety settings or prompt.")
-                 # Check candidate details if available
-                 try:
-                     finish_reason = response.candidates[0].finish_reason.name
-                     safety_ratings = response.candidates[0].safety_ratings
-                     logger.warning(f"Finish Reason: {finish_reason}")
-                     logger.warning(f"Safety Ratings: {safety_ratings}")
-                     if finish_reason == "SAFETY":
-                         return "I cannot provide a response to that request due to safety guidelines."
-                 except (IndexError, AttributeError) as e:
-                     logger.warning(f"Could not retrieve detailed block reason: {e}")
-                 return "I'm sorry, I couldn't generate a response for that."
-
-
-            response_text = response.text
-            logger.debug(f"Received response from Gemini: '{response_text[:100]}...'")
-            return response_text
+            return self._response_text(response)
 
         except Exception as e:
-            logger.error(f"Error during Gemini API call: {e}", exc_info=True)
+            logger.error("Error during Gemini API call: %s", e, exc_info=True)
             # Check for specific API errors if possible (e.g., quota, authentication)
             # Add more specific error handling based on google.api_core.exceptions if needed
             return "Sorry, I encountered an error while communicating with the AI service."
 
+    async def agenerate_response(
+        self,
+        prompt: str,
+        history: Optional[List[Dict[str, str]]] = None,
+        temperature: Optional[float] = None,
+        max_output_tokens: Optional[int] = None
+    ) -> str:
+        """
+        Async variant of generate_response() using the SDK's native async client,
+        so waiting on Gemini does not tie up a worker thread.
+        """
+        if not self.model:
+            logger.error("Gemini model not initialized. Cannot generate response.")
+            return "Error: The AI service is currently unavailable."
+
+        chat_history = history or []
+        generation_config_override = self._get_generation_config_override(temperature, max_output_tokens)
+
+        try:
+            logger.debug("Sending async prompt to Gemini: '%.100s...' with history length: %s", prompt, len(chat_history))
+            response = await self.model.generate_content_async(
+                _build_contents(chat_history, prompt),
+                generation_config=generation_config_override
+            )
+            return self._response_text(response)
+
+        except Exception as e:
+            logger.error("Error during async Gemini API call: %s", e, exc_info=True)
+            return "Sorry, I encountered an error while communicating with the AI service."
+
+
+    def stream_response(
+        self,
+        prompt: str,
+        history: Optional[List[Dict[str, str]]] = None,
+        temperature: Optional[float] = None,
+        max_output_tokens: Optional[int] = None
+    ) -> Iterator[str]:
+        """
+        Streams a response from the Gemini model's chat session as it is generated.
+
+        Args:
+            prompt: The latest user message or instruction.
+            history: The conversation history in Gemini format.
+            temperature: Override the default temperature if provided.
+            max_output_tokens: Override the default max tokens if provided.
+
+        Yields:
+            Text chunks of the response, in order.
+        """
+        if not self.model:
+            logger.error("Gemini model not initialized. Cannot stream response.")
+            yield "Error: The AI service is currently unavailable."
+            return
+
+        chat_history = history or []
+        generation_config_override = self._get_generation_config_override(temperature, max_output_tokens)
+        produced_text = False
+
+        try:
+            logger.debug("Streaming prompt to Gemini: '%.100s...' with history length: %s", prompt, len(chat_history))
+            response = self.model.generate_content(
+                _build_contents(chat_history, prompt),
+                generation_config=generation_config_override,
+                stream=True
+            )
+
+            for chunk in response:
+                # Chunks without parts (e.g. safety-blocked) carry no text
+                if chunk.parts:
+                    produced_text = True
+                    yield chunk.text
+
+            if not produced_text:
+                logger.warning("Gemini streamed response blocked or empty. Check safety settings or prompt.")
+                yield "I'm sorry, I couldn't generate a response for that."
+
+        except Exception as e:
+            logger.error("Error during Gemini streaming API call: %s", e, exc_info=True)
+            # Part of the reply was already sent: re-raise so the caller does not take the
+            # truncated text for a complete answer
+            if produced_text:
+                raise
+            yield "Sorry, I encountered an error while communicating with the AI service."
+
+    async def astream_response(
+        self,
+        prompt: str,
+        history: Optional[List[Dict[str, str]]] = None,
+        temperature: Optional[float] = None,
+        max_output_tokens: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        """Async variant of stream_response() using the SDK's native async streaming."""
+        if not self.model:
+            logger.error("Gemini model not initialized. Cannot stream response.")
+            yield "Error: The AI service is currently unavailable."
+            return
+
+        chat_history = history or []
+        generation_config_override = self._get_generation_config_override(temperature, max_output_tokens)
+        produced_text = False
+
+        try:
+            logger.debug("Streaming async prompt to Gemini: '%.100s...' with history length: %s", prompt, len(chat_history))
+            response = await self.model.generate_content_async(
+                _build_contents(chat_history, prompt),
+                generation_config=generation_config_override,
+                stream=True
+            )
+
+            async for chunk in response:
+                # Chunks without parts (e.g. safety-blocked) carry no text
+                if chunk.parts:
+                    produced_text = True
+                    yield chunk.text
+
+            if not produced_text:
+                logger.warning("Gemini streamed response blocked or empty. Check safety settings or prompt.")
+                yield "I'm sorry, I couldn't generate a response for that."
+
+        except Exception as e:
+            logger.error("Error during async Gemini streaming API call: %s", e, exc_info=True)
+            # Part of the reply was already sent: re-raise so the caller does not take the
+            # truncated text for a complete answer
+            if produced_text:
+                raise
+            yield "Sorry, I encountered an error while communicating with the AI service."
+
+    def _cached_intent(self, key: Tuple[str, Tuple[str, ...]]) -> Optional[str]:
+        """Returns a previously recognised intent for this input, refreshing its LRU position."""
+        intent = self._intent_cache.get(key)
+        if intent is not None:
+            self._intent_cache.move_to_end(key)
+            logger.debug("Intent cache hit: '%s'", intent)
+        return intent
+
+    def _remember_intent(self, key: Tuple[str, Tuple[str, ...]], raw_intent: str) -> str:
+        """Parses the model output, caching it only when it named a known intent."""
+        intent = _parse_intent(raw_intent, key[1])
+        if intent is None:
+            # Unrecognised output (or an error message) is not cached, so the next try asks again
+            return 'general_query' # Default if LLM fails or returns garbage
+        self._intent_cache[key] = intent
+        if len(self._intent_cache) > INTENT_CACHE_SIZE:
+            self._intent_cache.popitem(last=False)
+        return intent
 
     def determine_intent(
         self,
@@ -165,55 +378,74 @@ class GeminiService(LLMInterface):
             logger.error("Gemini model not initialized. Cannot determine intent.")
             return "unknown"
 
-        # Construct a prompt specifically for intent detection
-        intent_list_str = ", ".join([f"'{intent}'" for intent in available_intents])
-        prompt = f"""
-Analyze the following user message and determine the primary intent.
-The available intents are: {intent_list_str}, 'general_query'.
-
-User Message: "{user_input}"
-
-Based *only* on the user message and the available intents, which intent best describes the user's goal?
-Respond with *only* the single intent name from the list (e.g., 'check_order_status', 'ask_return_policy', 'request_human', 'general_query').
-Do not add any explanation or other text.
-Intent:"""
+        intents = tuple(available_intents)
+        cache_key = (_normalize_input(user_input), intents)
+        cached = self._cached_intent(cache_key)
+        if cached is not None:
+            return cached
 
-        # Use generate_response for this, but with specific settings
-        # Lower temperature might be better for classification tasks
-        intent_temperature = 0.1
-        intent_max_tokens = 20 # Intent name should be short
+        # Build the intent detection prompt from the template prepared for these intents
+        prompt = _intent_prompt_template(intents).format(user_input=user_input)
 
+        # Use generate_response for this, but with the intent classification settings
         try:
-            logger.debug(f"Determining intent for input: '{user_input}'")
+            logger.debug("Determining intent for input: '%s'", user_input)
             # We don't necessarily need history for simple intent detection,
             # but it could be added if context is important.
             # For now, call generate_response without history for simplicity.
             raw_intent = self.generate_response(
                 prompt=prompt,
                 history=None, # Or pass history if needed for context
-                temperature=intent_temperature,
-                max_output_tokens=intent_max_tokens
+                temperature=INTENT_TEMPERATURE,
+                max_output_tokens=INTENT_MAX_OUTPUT_TOKENS
             )
 
-            # Clean up the response - LLM might add quotes or extra spaces
-            cleaned_intent = raw_intent.strip().replace("'", "").replace('"', '').lower()
-
-            # Validate against available intents
-            valid_intents_lower = [intent.lower() for intent in available_intents] + ['general_query']
-            if cleaned_intent in valid_intents_lower:
-                # Return the original casing if matched
-                for original_intent in available_intents + ['general_query']:
-                     if original_intent.lower() == cleaned_intent:
-                         logger.info(f"Determined intent: '{original_intent}'")
-                         return original_intent
-            else:
-                logger.warning(f"LLM returned unrecognized intent '{raw_intent}' (cleaned: '{cleaned_intent}'). Defaulting to 'general_query'.")
-                return 'general_query' # Default if LLM fails or returns garbage
+            return self._remember_intent(cache_key, raw_intent)
+
+        except Exception as e:
+            logger.error("Error during intent determination: %s", e, exc_info=True)
+            return 'unknown' # Indicate an error occurred
+
+    async def adetermine_intent(
+        self,
+        user_input: str,
+        available_intents: List[str],
+        history: Optional[List[Dict[str, str]]] = None
+    ) -> str:
+        """Async variant of determine_intent(), classifying through agenerate_response()."""
+        if not self.model:
+            logger.error("Gemini model not initialized. Cannot determine intent.")
+            return "unknown"
+
+        intents = tuple(available_intents)
+        cache_key = (_normalize_input(user_input), intents)
+        cached = self._cached_intent(cache_key)
+        if cached is not None:
+            return cached
+
+        prompt = _intent_prompt_template(intents).format(user_input=user_input)
+
+        try:
+            logger.debug("Determining intent for input: '%s'", user_input)
+            raw_intent = await self.agenerate_response(
+                prompt=prompt,
+                history=None,
+                temperature=INTENT_TEMPERATURE,
+                max_output_tokens=INTENT_MAX_OUTPUT_TOKENS
+            )
+            return self._remember_intent(cache_key, raw_intent)
 
         except Exception as e:
-            logger.error(f"Error during intent determination: {e}", exc_info=True)
+            logger.error("Error during intent determination: %s", e, exc_info=True)
             return 'unknown' # Indicate an error occurred
 
+
+@lru_cache(maxsize=1)
+def get_gemini_service() -> GeminiService:
+    """Returns the process-wide GeminiService, creating it on first use; call get_gemini_service.cache_clear() to rebuild it."""
+    return GeminiService()
+
+
 # Example Usage (for testing)
 # if __name__ == "__main__":
 #     logging.basicConfig(level=logging.DEBUG) # Use DEBUG for detailed logs
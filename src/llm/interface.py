@@ -1,6 +1,7 @@
 # src/llm/interface.py
+import asyncio
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator, AsyncIterator
 
 class LLMInterface(ABC):
     """Abstract Base Class for Large Language Model services."""
@@ -29,6 +30,76 @@ class LLMInterface(ABC):
         """
         pass
 
+    def stream_response(
+        self,
+        prompt: str,
+        history: Optional[List[Dict[str, str]]] = None,
+        temperature: float = 0.7,
+        max_output_tokens: int = 1024
+    ) -> Iterator[str]:
+        """
+        Streams a response from the LLM chunk by chunk.
+
+        The default implementation yields the complete generate_response()
+        result as a single chunk; services with native streaming override it.
+
+        Args:
+            prompt: The user's input or a specific instruction for the LLM.
+            history: A list of previous turns in the conversation.
+            temperature: Controls the randomness of the output.
+            max_output_tokens: The maximum number of tokens to generate.
+
+        Yields:
+            Text chunks of the generated response, in order.
+        """
+        yield self.generate_response(
+            prompt=prompt,
+            history=history,
+            temperature=temperature,
+            max_output_tokens=max_output_tokens
+        )
+
+    async def agenerate_response(
+        self,
+        prompt: str,
+        history: Optional[List[Dict[str, str]]] = None,
+        temperature: float = 0.7,
+        max_output_tokens: int = 1024
+    ) -> str:
+        """
+        Async variant of generate_response() for use on the event loop.
+
+        The default implementation runs generate_response() in a worker thread;
+        services with a native async client override it.
+        """
+        return await asyncio.to_thread(
+            self.generate_response,
+            prompt=prompt,
+            history=history,
+            temperature=temperature,
+            max_output_tokens=max_output_tokens
+        )
+
+    async def astream_response(
+        self,
+        prompt: str,
+        history: Optional[List[Dict[str, str]]] = None,
+        temperature: float = 0.7,
+        max_output_tokens: int = 1024
+    ) -> AsyncIterator[str]:
+        """
+        Async variant of stream_response() for use on the event loop.
+
+        The default implementation yields the complete agenerate_response()
+        result as a single chunk; services with native async streaming override it.
+        """
+        yield await self.agenerate_response(
+            prompt=prompt,
+            history=history,
+            temperature=temperature,
+            max_output_tokens=max_output_tokens
+        )
+
     @abstractmethod
     def determine_intent(
         self,
@@ -51,4 +122,23 @@ class LLMInterface(ABC):
         """
         pass
 
+    async def adetermine_intent(
+        self,
+        user_input: str,
+        available_intents: List[str],
+        history: Optional[List[Dict[str, str]]] = None
+    ) -> str:
+        """
+        Async variant of determine_intent() for use on the event loop.
+
+        The default implementation runs determine_intent() in a worker thread;
+        services with a native async client override it.
+        """
+        return await asyncio.to_thread(
+            self.determine_intent,
+            user_input=user_input,
+            available_intents=available_intents,
+            history=history
+        )
+
     # You could add other common LLM tasks here, e.g., summarization, classification
\ No newline at end of file
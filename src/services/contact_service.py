@@ -1,12 +1,14 @@
 # src/services/contact_service.py
 import logging
-from sqlalchemy.orm import Session
-from src.db.database import SessionLocal
+from src.db.database import engine
 from src.db.models import ContactRequest
 import datetime
 
 logger = logging.getLogger(__name__)
 
+# Core insert on the table: no ORM object to build, track, or refresh after commit
+INSERT_CONTACT_REQUEST = ContactRequest.__table__.insert()
+
 def save_contact_request(full_name: str, email: str, phone_number: str = None, notes: str = None) -> bool:
     """
     Saves a customer's contact request to the database.
@@ -20,30 +22,27 @@ def save_contact_request(full_name: str, email: str, phone_number: str = None, n
     Returns:
         True if the request was saved successfully, False otherwise.
     """
-    logger.info(f"Attempting to save contact request for email: {email}")
-    db: Session = SessionLocal()
-    try:
-        # Basic validation (can be enhanced in agent/utils)
-        if not full_name or not email:
-            logger.warning("Attempted to save contact request with missing name or email.")
-            return False
+    logger.info("Attempting to save contact request for email: %s", email)
+    # Basic validation (can be enhanced in agent/utils), done before touching the pool
+    if not full_name or not email:
+        logger.warning("Attempted to save contact request with missing name or email.")
+        return False
 
-        new_request = ContactRequest(
-            full_name=full_name,
-            email=email,
-            phone_number=phone_number,
-            request_timestamp=datetime.datetime.now(datetime.UTC), # Ensure UTC timestamp
-            notes=notes
-        )
-        db.add(new_request)
-        db.commit()
-        db.refresh(new_request) # To get the generated ID if needed
-        logger.info(f"Contact request saved successfully with ID: {new_request.id}")
+    try:
+        # engine.begin() checks a pooled connection out, commits on success and rolls back on error
+        with engine.begin() as connection:
+            result = connection.execute(
+                INSERT_CONTACT_REQUEST,
+                {
+                    "full_name": full_name,
+                    "email": email,
+                    "phone_number": phone_number,
+                    "request_timestamp": datetime.datetime.now(datetime.UTC), # Ensure UTC timestamp
+                    "notes": notes,
+                }
+            )
+        logger.info("Contact request saved successfully with ID: %s", result.inserted_primary_key[0])
         return True
     except Exception as e:
-        logger.error(f"Database error saving contact request for {email}: {e}", exc_info=True)
-        db.rollback() # Rollback the transaction on error
+        logger.error("Database error saving contact request for %s: %s", email, e, exc_info=True)
         return False
-    finally:
-        db.close()
-        logger.debug(f"Database session closed for contact request save: {email}")
\ No newline at end of file
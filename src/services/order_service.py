@@ -1,13 +1,29 @@
 # src/services/order_service.py
 import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from sqlalchemy import bindparam, select
 from sqlalchemy.orm import Session
 from src.db.database import SessionLocal, get_db # Assuming get_db yields a session
 from src.db.models import Order
 from src.core.config import ORDER_STATUS_DESCRIPTIONS
+from src.utils.helpers import ORDER_ID_PATTERN_FULL
 import asyncio # Needed for running sync code in async method if necessary
 
 logger = logging.getLogger(__name__)
 
+# Built once with a bound parameter, so every lookup reuses the engine's compiled-statement cache entry
+SELECT_ORDER_BY_ID = select(Order).where(Order.order_id == bindparam("order_id")).limit(1)
+
+# Short-lived cache of lookups, so a user re-asking about the same order skips the database
+ORDER_CACHE_SIZE = 1024
+ORDER_CACHE_TTL_SECONDS = 60
+# order_id -> (expiry on the monotonic clock, order); misses are cached as None too
+_order_cache: "OrderedDict[str, Tuple[float, Optional[Order]]]" = OrderedDict()
+# Lookups currently waiting on the database, so concurrent requests for one ID share a single query
+_inflight_lookups: Dict[str, "asyncio.Future[Optional[Order]]"] = {}
+
 # --- Helper Function ---
 def format_order_details(order: Order | None) -> str:
     """Formats order details into a user-friendly string."""
@@ -15,7 +31,10 @@ def format_order_details(order: Order | None) -> str:
         # Return a generic message if None is passed explicitly
         return "Order details could not be retrieved."
 
-    status_desc = ORDER_STATUS_DESCRIPTIONS.get(order.order_status, f"Status: {order.order_status}")
+    status_desc = ORDER_STATUS_DESCRIPTIONS.get(order.order_status)
+    if status_desc is None:
+        # Only build the fallback text for statuses we have no description for
+        status_desc = f"Status: {order.order_status}"
     details = [f"Order ID: {order.order_id}", status_desc]
 
     # Use getattr with default None to safely access optional date fields
@@ -43,6 +62,67 @@ def format_order_details(order: Order | None) -> str:
     return "\n".join(details)
 
 
+def _fetch_order(order_id: str) -> Order | None:
+    """Looks up a single order in its own session (blocking; run via asyncio.to_thread)."""
+    db: Session = SessionLocal()
+    try:
+        return db.execute(SELECT_ORDER_BY_ID, {"order_id": order_id}).scalars().first()
+    finally:
+        # Ensure the session is closed even if errors occur
+        db.close()
+        logger.debug("Database session closed for order query: %s", order_id)
+
+
+def _get_cached_order(order_id: str) -> Tuple[bool, Optional[Order]]:
+    """Returns (hit, order) for a cached lookup, dropping the entry if it has expired."""
+    entry = _order_cache.get(order_id)
+    if entry is None:
+        return False, None
+    expires_at, order = entry
+    if expires_at <= time.monotonic():
+        del _order_cache[order_id]
+        return False, None
+    _order_cache.move_to_end(order_id)
+    return True, order
+
+
+def _cache_order(order_id: str, order: Optional[Order]) -> None:
+    """Stores a lookup result, evicting the least recently used entry when the cache is full."""
+    _order_cache[order_id] = (time.monotonic() + ORDER_CACHE_TTL_SECONDS, order)
+    _order_cache.move_to_end(order_id)
+    if len(_order_cache) > ORDER_CACHE_SIZE:
+        _order_cache.popitem(last=False)
+
+
+def invalidate_cached_order(order_id: Optional[str] = None) -> None:
+    """Forgets one cached order (e.g. after its status changes), or all of them if no ID is given."""
+    if order_id is None:
+        _order_cache.clear()
+    else:
+        _order_cache.pop(order_id, None)
+
+
+async def _load_order(order_id: str) -> Optional[Order]:
+    """Fetches an order and caches it, joining any lookup of the same ID already in flight."""
+    pending = _inflight_lookups.get(order_id)
+    if pending is None:
+        # Open, query and close the session in a single worker-thread hop
+        # so the event loop only waits on one thread handoff per lookup.
+        pending = asyncio.ensure_future(asyncio.to_thread(_fetch_order, order_id))
+        _inflight_lookups[order_id] = pending
+
+        def _settle(done: "asyncio.Future[Optional[Order]]") -> None:
+            """Drops the finished lookup from the in-flight table and caches its result."""
+            if _inflight_lookups.get(order_id) is done:
+                del _inflight_lookups[order_id]
+            if not done.cancelled() and done.exception() is None:
+                _cache_order(order_id, done.result())
+
+        pending.add_done_callback(_settle)
+    # Shielded, so one caller being cancelled does not cancel the query for the others
+    return await asyncio.shield(pending)
+
+
 # --- Service Class ---
 class OrderService:
     """Service class for handling order-related operations."""
@@ -60,34 +140,29 @@ class OrderService:
         Returns:
             A formatted string with order details or a 'not found'/'error' message.
         """
-        logger.info(f"Attempting to fetch order details for order_id: {order_id}")
+        logger.info("Attempting to fetch order details for order_id: %s", order_id)
 
         # Basic validation
-        if not order_id or len(order_id) != 32 or not order_id.isalnum():
-            logger.warning(f"Invalid order ID format received: {order_id}")
+        if not order_id or ORDER_ID_PATTERN_FULL.match(order_id) is None:
+            logger.warning("Invalid order ID format received: %s", order_id)
             # Return a specific message for invalid format
             return "The provided order ID seems invalid. Please provide a 32-character alphanumeric ID."
 
-        db: Session = SessionLocal()
         try:
-            # Run the synchronous database query in a separate thread
-            # to avoid blocking the asyncio event loop.
-            order = await asyncio.to_thread(
-                db.query(Order).filter(Order.order_id == order_id).first
-            )
+            hit, order = _get_cached_order(order_id)
+            if hit:
+                logger.debug("Order cache hit for ID: %s", order_id)
+            else:
+                order = await _load_order(order_id)
 
             if order:
-                logger.info(f"Order found for ID {order_id}. Status: {order.order_status}")
+                logger.info("Order found for ID %s. Status: %s", order_id, order.order_status)
                 # Use the standalone helper function for formatting
                 return format_order_details(order)
             else:
-                logger.warning(f"No order found for ID: {order_id}")
+                logger.warning("No order found for ID: %s", order_id)
                 return f"Sorry, I couldn't find any order with the ID '{order_id}'. Please double-check the ID."
 
         except Exception as e:
-            logger.error(f"Database error fetching order {order_id}: {e}", exc_info=True)
-            return "Sorry, I encountered an error while trying to retrieve the order details. Please try again later."
-        finally:
-            # Ensure the session is closed even if errors occur
-            await asyncio.to_thread(db.close)
-            logger.debug(f"Database session closed for order query: {order_id}")
\ No newline at end of file
+            logger.error("Database error fetching order %s: %s", order_id, e, exc_info=True)
+            return "Sorry, I encountered an error while trying to retrieve the order details. Please try again later."
\ No newline at end of file
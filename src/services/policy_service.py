@@ -2,139 +2,149 @@
 import json
 import logging
 import os
-from typing import Dict, Any, Optional
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Any, Mapping, NamedTuple, Optional
 from src.core.config import POLICIES_JSON_PATH
 
 logger = logging.getLogger(__name__)
 
+# (policy key, summary line template) for the plain-text fields of a policy section, in display order;
+# 'exceptions' is handled separately because it may be a string or a list
+SUMMARY_FIELDS = (
+    ('window', "Return Window: {}."),
+    ('condition', "Condition: {}"),
+    ('refund_type', "Refunds: {}"),
+    ('process', "Process: {}"),
+)
+
+class PolicyData(NamedTuple):
+    """Read-only policies loaded from POLICIES_JSON_PATH, plus the error message if loading failed."""
+    policies: Mapping[str, Any]
+    error: Optional[str] = None
+    formatted: str = "" # get_formatted_policies() output, built once at load
+    sections: Mapping[str, Any] = MappingProxyType({}) # What get_policy() looks up in; empty if loading failed
+
+
+def _policy_error(message: str) -> PolicyData:
+    """Builds the PolicyData used when policies are unavailable (mirrors the old {'error': ...} cache)."""
+    return PolicyData(policies=MappingProxyType({"error": message}), error=message, formatted=message)
+
+
+def _format_section(key: str, value: Any) -> str:
+    """Formats one policy section as a heading followed by its items."""
+    # Format key nicely (e.g., general_return_policy -> General Return Policy)
+    heading = f"\n### {key.replace('_', ' ').title()} ###\n"
+    if isinstance(value, dict):
+        # Format dictionary items
+        return heading + "\n".join([f"- {k.replace('_', ' ').capitalize()}: {v}" for k, v in value.items()]) + "\n"
+    # Handle non-dict policy sections if they exist
+    return heading + f"{str(value)}\n"
+
+
+def _format_policies(policies: Mapping[str, Any]) -> str:
+    """Returns all policies formatted as a string (joined once instead of grown with +=)."""
+    formatted_output = "Here are our policies:\n" + "".join([_format_section(key, value) for key, value in policies.items()])
+    return formatted_output.strip() # Remove trailing newline
+
+
+@lru_cache(maxsize=1)
+def _load_policies() -> PolicyData:
+    """Loads the policies once per process; call _load_policies.cache_clear() to re-read the file."""
+    logger.info("Attempting to load policies from: %s", POLICIES_JSON_PATH)
+    if not os.path.exists(POLICIES_JSON_PATH):
+        logger.error("Policy file not found at %s. Policies unavailable.", POLICIES_JSON_PATH)
+        return _policy_error("Policy information is currently unavailable.")
+
+    try:
+        with open(POLICIES_JSON_PATH, 'r', encoding='utf-8') as f:
+            policies = json.load(f)
+        logger.info("Policies loaded successfully into cache.")
+        # Read-only view, so the shared policies cannot be mutated by a caller.
+        # The policies are static, so the formatted listing is built here once.
+        policies_view = MappingProxyType(policies)
+        return PolicyData(policies=policies_view, formatted=_format_policies(policies), sections=policies_view)
+    except json.JSONDecodeError as e:
+        logger.error("Error decoding JSON from %s: %s", POLICIES_JSON_PATH, e, exc_info=True)
+        return _policy_error("Error reading policy information.")
+    except Exception as e:
+        logger.error("An unexpected error occurred while loading policies: %s", e, exc_info=True)
+        return _policy_error("An unexpected error occurred.")
+
+
+def get_policy(policy_name: str) -> Optional[Dict[str, Any]]:
+    """Retrieves a specific policy section, or None if it is missing or policies failed to load."""
+    # 'sections' is empty when loading failed, so a single lookup covers both cases
+    policy_section = _load_policies().sections.get(policy_name)
+    if policy_section is None and not _load_policies().error:
+         logger.warning("Policy section '%s' not found in cache.", policy_name)
+    return policy_section
+
+
+def get_all_policies() -> Mapping[str, Any]:
+    """Returns all loaded policies (a mapping with an 'error' key if loading failed)."""
+    return _load_policies().policies
+
+
+def get_policy_summary(policy_name: str = "general_return_policy") -> str:
+    """
+    Provides a basic text summary of a specific policy from the cache.
+    Adapts to the structure in the user's policies.json.
+    """
+    policy = get_policy(policy_name)
+
+    if policy is None:
+        # Surface the load error, if that is why the policy is missing
+        error = _load_policies().error
+        if error:
+             return error
+        logger.warning("Could not retrieve policy section '%s' for summary.", policy_name)
+        return f"Sorry, I couldn't find the details for the '{policy_name}' policy."
+    if not isinstance(policy, dict): # Handle case where policy might not be a dict
+         logger.warning("Policy section '%s' is not a dictionary: %s", policy_name, policy)
+         return f"Sorry, the details for '{policy_name}' policy are not formatted correctly."
+
+    summary_parts = [template.format(policy[key]) for key, template in SUMMARY_FIELDS if key in policy]
+    # Handle 'exceptions' which might be a string or a list
+    if 'exceptions' in policy and policy['exceptions']:
+        exceptions_text = policy['exceptions']
+        if isinstance(exceptions_text, list):
+            summary_parts.append("Exceptions include: " + ", ".join(exceptions_text))
+        elif isinstance(exceptions_text, str):
+             summary_parts.append(f"Exceptions: {exceptions_text}")
+        else:
+             logger.warning("Unexpected type for 'exceptions' in policy '%s': %s", policy_name, type(exceptions_text))
+             summary_parts.append(f"Exceptions: {str(exceptions_text)}")
+
+    return "\n".join(summary_parts) if summary_parts else f"No summary details available for the '{policy_name}' policy."
+
+
+def get_formatted_policies() -> str:
+    """Returns all loaded policies formatted as a string (or the load error)."""
+    return _load_policies().formatted
+
+
 class PolicyService:
-    """Handles loading and retrieving policy information using a class-based cache."""
-
-    _instance = None
-    _policies_cache: Optional[Dict[str, Any]] = None
-
-    # --- Singleton Pattern (Optional but ensures only one instance loads the file) ---
-    # If you prefer not to use a singleton, remove __new__ and instantiate
-    # PolicyService() where needed (e.g., once in your main app setup).
-    def __new__(cls, *args, **kwargs):
-        if cls._instance is None:
-            cls._instance = super(PolicyService, cls).__new__(cls)
-            # Load policies only when the first instance is created
-            cls._instance._load_policies()
-        return cls._instance
-    # --- End Singleton Pattern ---
-
-    # If not using Singleton, uncomment the __init__ and remove __new__
-    # def __init__(self):
-    #     """Initializes the PolicyService."""
-    #     if PolicyService._policies_cache is None:
-    #          self._load_policies()
-
-    def _load_policies(self):
-        """Loads policies from the JSON file into the class cache."""
-        logger.info(f"Attempting to load policies from: {POLICIES_JSON_PATH}")
-        if not os.path.exists(POLICIES_JSON_PATH):
-            logger.error(f"Policy file not found at {POLICIES_JSON_PATH}. Policies unavailable.")
-            PolicyService._policies_cache = {"error": "Policy information is currently unavailable."}
-            return
-
-        try:
-            with open(POLICIES_JSON_PATH, 'r', encoding='utf-8') as f:
-                policies = json.load(f)
-            PolicyService._policies_cache = policies # Cache the loaded policies
-            logger.info("Policies loaded successfully into cache.")
-        except json.JSONDecodeError as e:
-            logger.error(f"Error decoding JSON from {POLICIES_JSON_PATH}: {e}", exc_info=True)
-            PolicyService._policies_cache = {"error": "Error reading policy information."}
-        except Exception as e:
-            logger.error(f"An unexpected error occurred while loading policies: {e}", exc_info=True)
-            PolicyService._policies_cache = {"error": "An unexpected error occurred."}
+    """Backward-compatible facade over the module-level policy functions (policies are shared per process)."""
 
     def get_policy(self, policy_name: str) -> Optional[Dict[str, Any]]:
         """Retrieves a specific policy section from the cache."""
-        if PolicyService._policies_cache is None:
-            logger.warning("Policy cache is not initialized.")
-            # Attempt to load again? Or rely on initial load.
-            # self._load_policies() # Uncomment if you want to retry loading on demand
-            return None # Or return the error dict if present
-        if "error" in PolicyService._policies_cache:
-             return None # Policies failed to load initially
-
-        policy_section = PolicyService._policies_cache.get(policy_name)
-        if policy_section is None:
-             logger.warning(f"Policy section '{policy_name}' not found in cache.")
-        return policy_section
-
-    def get_all_policies(self) -> Dict[str, Any]:
+        return get_policy(policy_name)
+
+    def get_all_policies(self) -> Mapping[str, Any]:
         """Returns all loaded policies from the cache."""
-        if PolicyService._policies_cache is None:
-             logger.warning("Policy cache is not initialized.")
-             return {"error": "Policies not loaded."}
-        return PolicyService._policies_cache
+        return get_all_policies()
 
     def get_policy_summary(self, policy_name: str = "general_return_policy") -> str:
-        """
-        Provides a basic text summary of a specific policy from the cache.
-        Adapts to the structure in the user's policies.json.
-        """
-        policy = self.get_policy(policy_name) # Use the class method to get from cache
-
-        if policy is None:
-            # Check if the cache itself has an error message
-            if PolicyService._policies_cache and "error" in PolicyService._policies_cache:
-                 return PolicyService._policies_cache["error"]
-            logger.warning(f"Could not retrieve policy section '{policy_name}' for summary.")
-            return f"Sorry, I couldn't find the details for the '{policy_name}' policy."
-        if not isinstance(policy, dict): # Handle case where policy might not be a dict
-             logger.warning(f"Policy section '{policy_name}' is not a dictionary: {policy}")
-             return f"Sorry, the details for '{policy_name}' policy are not formatted correctly."
-
-
-        summary_parts = []
-        # Use 'window' key from user's JSON
-        if 'window' in policy:
-            summary_parts.append(f"Return Window: {policy['window']}.")
-        if 'condition' in policy:
-            summary_parts.append(f"Condition: {policy['condition']}")
-        if 'refund_type' in policy:
-            summary_parts.append(f"Refunds: {policy['refund_type']}")
-        if 'process' in policy:
-             summary_parts.append(f"Process: {policy['process']}")
-        # Handle 'exceptions' which might be a string or a list
-        if 'exceptions' in policy and policy['exceptions']:
-            exceptions_text = policy['exceptions']
-            if isinstance(exceptions_text, list):
-                summary_parts.append("Exceptions include: " + ", ".join(exceptions_text))
-            elif isinstance(exceptions_text, str):
-                 summary_parts.append(f"Exceptions: {exceptions_text}")
-            else:
-                 logger.warning(f"Unexpected type for 'exceptions' in policy '{policy_name}': {type(exceptions_text)}")
-                 summary_parts.append(f"Exceptions: {str(exceptions_text)}")
-
-        return "\n".join(summary_parts) if summary_parts else f"No summary details available for the '{policy_name}' policy."
+        """Provides a basic text summary of a specific policy from the cache."""
+        return get_policy_summary(policy_name)
 
     def get_formatted_policies(self) -> str:
         """Returns all loaded policies formatted as a string."""
-        policies = self.get_all_policies() # Use class method
-        if "error" in policies:
-            return policies["error"]
-
-        formatted_output = "Here are our policies:\n"
-        for key, value in policies.items():
-            # Format key nicely (e.g., general_return_policy -> General Return Policy)
-            formatted_key = key.replace('_', ' ').title()
-            formatted_output += f"\n### {formatted_key} ###\n"
-            if isinstance(value, dict):
-                # Format dictionary items
-                formatted_output += "\n".join([f"- {k.replace('_', ' ').capitalize()}: {v}" for k, v in value.items()]) + "\n"
-            else:
-                # Handle non-dict policy sections if they exist
-                formatted_output += f"{str(value)}\n"
-        return formatted_output.strip() # Remove trailing newline
-
-# Example of how to use (instantiate once in your app)
-# policy_service = PolicyService()
-# summary = policy_service.get_policy_summary()
+        return get_formatted_policies()
+
+# Example of how to use
+# summary = get_policy_summary()
 # print(summary)
-# all_formatted = policy_service.get_formatted_policies()
-# print(all_formatted)
\ No newline at end of file
+# all_formatted = get_formatted_policies()
+# print(all_formatted)
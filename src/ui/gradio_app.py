@@ -1,28 +1,32 @@
 # src/ui/gradio_app.py
 import os
+import re
 import logging
 import asyncio
 import gradio as gr
-import uuid
+import secrets
+from starlette.middleware import Middleware
+from starlette.middleware.gzip import GZipMiddleware
 from typing import Dict, Any, List, Tuple, Optional, AsyncIterator
-import html
 
 # Ensure imports happen relative to the root when run via app.py
 try:
     from src.core.conversation import ConversationManager
-    from src.llm.gemini_service import GeminiService
-    from src.core.config import GOOGLE_API_KEY
+    from src.llm.gemini_service import get_gemini_service
+    from src.core.config import GOOGLE_API_KEY, setup_logging
+    from src.utils.helpers import coalesce_updates
 except ModuleNotFoundError:
     # Handle case where script might be run directly
     import sys
     sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
     from src.core.conversation import ConversationManager
-    from src.llm.gemini_service import GeminiService
-    from src.core.config import GOOGLE_API_KEY
+    from src.llm.gemini_service import get_gemini_service
+    from src.core.config import GOOGLE_API_KEY, setup_logging
+    from src.utils.helpers import coalesce_updates
 
-# Configure logging
+# Configure logging (no-op if the entry point already did)
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+setup_logging()
 
 # --- Service Initialization ---
 conversation_manager = None
@@ -32,40 +36,116 @@ try:
         logger.error("GOOGLE_API_KEY not found. Please set it in your .env file.")
         # Don't raise here, let the UI handle showing an error
     else:
-        llm_service = GeminiService()
+        llm_service = get_gemini_service() # Shared client, configured once per process
         conversation_manager = ConversationManager(llm_service=llm_service)
         logger.info("Successfully initialized LLM service and conversation manager.")
 except Exception as e:
-    logger.error(f"CRITICAL: Failed to initialize core services: {e}", exc_info=True)
+    logger.error("CRITICAL: Failed to initialize core services: %s", e, exc_info=True)
     # conversation_manager remains None
 
 # --- Constants ---
 INITIAL_WELCOME_MESSAGE = "Welcome! How can I help you today?"
 USER_PLACEHOLDER_MESSAGE = "..." # Placeholder while bot is thinking
 DEFAULT_ERROR_MESSAGE = "I'm sorry, an internal error occurred. Please try again."
+# Chat events handled at once; the handler is async, so waiting on the LLM costs no thread
+GRADIO_CONCURRENCY_LIMIT = 32
+# Events allowed to wait for a free slot; beyond this users are told the queue is full instead of waiting indefinitely
+GRADIO_MAX_QUEUE_SIZE = 100
+# Streamed replies are pushed to the browser at most this often, unless this many new characters piled up
+STREAM_FLUSH_SECONDS = 0.05
+STREAM_FLUSH_CHARS = 64
+# Input updates for the start and end of a turn, built once; Gradio copies a component's
+# constructor args when it is returned as an update, so sharing these across requests is safe
+TEXTBOX_DISABLED = gr.Textbox(value="", interactive=False, placeholder="Ari is thinking...")
+TEXTBOX_ENABLED = gr.Textbox(value="", interactive=True, placeholder="Type your message...")
+BUTTON_DISABLED = gr.Button(interactive=False)
+BUTTON_ENABLED = gr.Button(interactive=True)
+# Added to server-sent event responses so reverse proxies (nginx, cloud load balancers) pass each chunk straight through
+SSE_NO_BUFFERING_HEADERS = ((b"x-accel-buffering", b"no"), (b"cache-control", b"no-cache"))
+# Responses smaller than this are not worth compressing
+GZIP_MINIMUM_SIZE = 1000
+# Gradio's server-sent event routes; gzip would hold their chunks back in the compressor
+SSE_PATH_MARKERS = ("/queue/data", "/heartbeat/")
 # Construct absolute paths for assets relative to this file's location
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
 ASSETS_DIR = os.path.abspath(os.path.join(CURRENT_DIR, '..', '..', 'assets'))
-BOT_AVATAR = os.path.join(ASSETS_DIR, "bot-icon.png") if os.path.exists(os.path.join(ASSETS_DIR, "bot-icon.png")) else None
-USER_AVATAR = os.path.join(ASSETS_DIR, "user-icon.png") if os.path.exists(os.path.join(ASSETS_DIR, "user-icon.png")) else None
-FAVICON_PATH = os.path.join(ASSETS_DIR, "favicon.ico") if os.path.exists(os.path.join(ASSETS_DIR, "favicon.ico")) else None
+
+
+def _asset_names() -> frozenset:
+    """Lists the asset directory once, so each optional asset is a set lookup rather than a stat call."""
+    try:
+        with os.scandir(ASSETS_DIR) as entries:
+            return frozenset(entry.name for entry in entries)
+    except OSError:
+        return frozenset()
+
+
+def _asset_path(name: str, available: frozenset) -> Optional[str]:
+    """Returns the absolute path of an asset, or None if it is not shipped."""
+    return os.path.join(ASSETS_DIR, name) if name in available else None
+
+
+_ASSETS = _asset_names()
+BOT_AVATAR = _asset_path("bot-icon.png", _ASSETS)
+USER_AVATAR = _asset_path("user-icon.png", _ASSETS)
+FAVICON_PATH = _asset_path("favicon.ico", _ASSETS)
+
+# Chat history in Gradio's "messages" format: [{"role": "user" | "assistant", "content": str}, ...]
+ChatHistory = List[Dict[str, Any]]
 
 # --- Helper Functions ---
 
 def generate_new_session_id() -> str:
     """Generates a new unique session ID."""
-    return str(uuid.uuid4())
-
-def get_initial_chat_history() -> List[Tuple[Optional[str], Optional[str]]]:
+    return secrets.token_hex(16)
+
+class NoProxyBufferingMiddleware:
+    """ASGI middleware that asks proxies not to buffer or cache the queue's event streams."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", ()))
+                names = {name.lower() for name, _ in headers}
+                # Only event streams: static assets and API responses keep their normal caching
+                if any(name.lower() == b"content-type" and value.startswith(b"text/event-stream") for name, value in headers):
+                    headers.extend(header for header in SSE_NO_BUFFERING_HEADERS if header[0] not in names)
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+class GZipExceptStreamsMiddleware:
+    """Gzips page, script and stylesheet responses, passing the queue's event streams through untouched."""
+
+    def __init__(self, app, minimum_size: int = GZIP_MINIMUM_SIZE):
+        self.app = app
+        self.gzip_app = GZipMiddleware(app, minimum_size=minimum_size)
+
+    async def __call__(self, scope, receive, send):
+        # Older Starlette versions compress event streams too, so they are routed around gzip by path
+        if scope["type"] == "http" and not any(marker in scope["path"] for marker in SSE_PATH_MARKERS):
+            await self.gzip_app(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
+
+def get_initial_chat_history() -> ChatHistory:
     """Returns the initial chat history structure for Gradio Chatbot."""
-    return [(None, INITIAL_WELCOME_MESSAGE)]
+    return [{"role": "assistant", "content": INITIAL_WELCOME_MESSAGE}]
 
 async def handle_chat_interaction(
     message: str,
-    history: List[Tuple[Optional[str], Optional[str]]],
+    history: ChatHistory,
     session_id: str
 ) -> AsyncIterator[Tuple[
-        List[Tuple[Optional[str], Optional[str]]], # Updated History
+        ChatHistory,                               # Updated History
         str,                                       # Updated Session ID
         gr.Textbox,                                # Textbox update
         gr.Button                                  # Button update
@@ -73,73 +153,87 @@ async def handle_chat_interaction(
     """
     Handles user messages, interacts with the backend, and updates UI state. (Async Generator)
     """
-    # 1. Input Validation & Sanitization
+    # 1. Input Validation
     if not message or not message.strip():
         return # Stop generator for empty messages
 
-    sanitized_message = html.escape(message.strip())
+    # No html.escape here: the Chatbot sanitizes HTML when rendering, and escaping
+    # the raw text would show entities like "&amp;" to the user and the LLM
+    user_message = message.strip()
 
     # 2. Ensure Session ID
     if not session_id:
         session_id = generate_new_session_id()
-        logger.info(f"Started new session: {session_id}")
+        logger.info("Started new session: %s", session_id)
 
     # 3. Update History & UI for Loading State
-    updated_history = history + [(sanitized_message, None)] # Add user message
-    thinking_history = updated_history + [(None, USER_PLACEHOLDER_MESSAGE)] # Add placeholder
+    # One copy of the history per turn: the bot's reply is the last message and only its content changes
+    # (Gradio postprocesses each yield before the next one, so reusing the list is safe)
+    bot_message = {"role": "assistant", "content": USER_PLACEHOLDER_MESSAGE} # Placeholder until the reply arrives
+    chat_history = history + [{"role": "user", "content": user_message}, bot_message]
 
     # Disable input fields while processing
     ui_updates_processing = (
-        thinking_history,
+        chat_history,
         session_id,
-        gr.Textbox(value="", interactive=False, placeholder="Ari is thinking..."),
-        gr.Button(interactive=False)
+        TEXTBOX_DISABLED,
+        BUTTON_DISABLED
     )
     yield ui_updates_processing
 
     # 4. Check Conversation Manager Status
     if conversation_manager is None:
-        logger.error(f"Session {session_id}: ConversationManager not available.")
-        final_history = updated_history + [(None, CONV_MANAGER_ERROR_MSG)]
+        logger.error("Session %s: ConversationManager not available.", session_id)
+        bot_message["content"] = CONV_MANAGER_ERROR_MSG
         ui_updates_final = (
-            final_history,
+            chat_history,
             session_id,
-            gr.Textbox(value="", interactive=True, placeholder="Type your message..."), # Re-enable
-            gr.Button(interactive=True) # Re-enable
+            TEXTBOX_ENABLED, # Re-enable
+            BUTTON_ENABLED # Re-enable
         )
         yield ui_updates_final
         return # Stop processing
 
-    # 5. Process Message with Backend
-    logger.info(f"Session {session_id}: Processing message: '{sanitized_message[:50]}...'")
+    # 5. Process Message with Backend (general answers stream in as the LLM generates them)
+    logger.info("Session %s: Processing message: '%.50s...'", session_id, user_message)
     bot_response = DEFAULT_ERROR_MESSAGE
     try:
-        response_data = await conversation_manager.handle_message(
-            user_input=sanitized_message,
-            session_id=session_id
-        )
-        bot_response = response_data.get("response", DEFAULT_ERROR_MESSAGE)
-        session_id = response_data.get("session_id", session_id)
-        logger.info(f"Session {session_id}: Bot response: '{bot_response[:100]}...'")
+        async for response_data in coalesce_updates(
+            conversation_manager.handle_message_stream(user_input=user_message, session_id=session_id),
+            max_chars=STREAM_FLUSH_CHARS,
+            max_wait=STREAM_FLUSH_SECONDS
+        ):
+            bot_response = response_data.get("response", DEFAULT_ERROR_MESSAGE)
+            session_id = response_data.get("session_id", session_id)
+            # Show the partial reply; input stays disabled until the stream finishes, and since
+            # the first yield already disabled it, gr.skip() leaves those components untouched
+            bot_message["content"] = bot_response
+            yield (
+                chat_history,
+                session_id,
+                gr.skip(),
+                gr.skip()
+            )
+        logger.info("Session %s: Bot response: '%.100s...'", session_id, bot_response)
 
     except Exception as e:
-        logger.error(f"Session {session_id}: Error during conversation_manager.handle_message: {e}", exc_info=True)
+        logger.error("Session %s: Error during conversation_manager.handle_message_stream: %s", session_id, e, exc_info=True)
 
     # 6. Final UI Update with Bot Response
-    final_history = updated_history + [(None, bot_response)]
+    bot_message["content"] = bot_response
     ui_updates_final = (
-        final_history,
+        chat_history,
         session_id,
-        gr.Textbox(value="", interactive=True, placeholder="Type your message..."), # Re-enable
-        gr.Button(interactive=True) # Re-enable
+        TEXTBOX_ENABLED, # Re-enable
+        BUTTON_ENABLED # Re-enable
     )
     yield ui_updates_final
 
 
-def clear_chat_action() -> Tuple[List[Tuple[Optional[str], Optional[str]]], str, gr.Textbox]:
+def clear_chat_action() -> Tuple[ChatHistory, str, gr.Textbox]:
     """Clears the chat history and resets the session."""
     new_session_id = generate_new_session_id()
-    logger.info(f"Chat cleared. New session ID: {new_session_id}")
+    logger.info("Chat cleared. New session ID: %s", new_session_id)
     return get_initial_chat_history(), new_session_id, gr.Textbox(placeholder="Type your message...")
 
 
@@ -425,6 +519,19 @@ body {
 }
 """
 
+_CSS_COMMENT_PATTERN = re.compile(r'/\*.*?\*/', re.S)
+_CSS_WHITESPACE_PATTERN = re.compile(r'\s+')
+_CSS_PUNCTUATION_SPACE_PATTERN = re.compile(r'\s*([{};,])\s*')
+
+def minify_css(css: str) -> str:
+    """Strips comments and redundant whitespace from a stylesheet (it has no string literals that need them)."""
+    css = _CSS_COMMENT_PATTERN.sub('', css)
+    css = _CSS_WHITESPACE_PATTERN.sub(' ', css)
+    return _CSS_PUNCTUATION_SPACE_PATTERN.sub(r'\1', css).strip()
+
+# Minified once at import; this is what every page load receives
+MODERN_CSS_MIN = minify_css(modern_css)
+
 def create_modern_demo() -> gr.Blocks:
     """
     Creates the Gradio Blocks UI for the chatbot.
@@ -448,9 +555,10 @@ def create_modern_demo() -> gr.Blocks:
     )
 
     # --- UI Layout Definition ---
-    with gr.Blocks(theme=theme, css=modern_css, title="Ari E-commerce Assistant", analytics_enabled=False) as demo:
-        # State to store the unique session ID for the conversation
-        session_state = gr.State(value=generate_new_session_id)
+    with gr.Blocks(theme=theme, css=MODERN_CSS_MIN, title="Ari E-commerce Assistant", analytics_enabled=False) as demo:
+        # State to store the unique session ID for the conversation; left empty until the first
+        # message, where handle_chat_interaction creates it, so visitors who never chat cost nothing
+        session_state = gr.State(value="")
 
         # --- Hero Section --- (Displays title and subtitle)
         with gr.Column(elem_classes="hero-section"):
@@ -463,12 +571,14 @@ def create_modern_demo() -> gr.Blocks:
             with gr.Column(elem_classes="chatbot-area"):
                 chatbot = gr.Chatbot(
                     value=get_initial_chat_history,
+                    type="messages", # Role/content dicts; the tuple format is deprecated in Gradio 5
                     label="Chat History",
                     bubble_full_width=False,
                     height=600, # Max height constraint
                     avatar_images=(USER_AVATAR, BOT_AVATAR),
                     show_copy_button=True,
-                    layout="bubble"
+                    layout="bubble",
+                    sanitize_html=True # Untrusted user/LLM HTML is cleaned at render time
                     # render=False # Only needed if placing it manually later
                 )
 
@@ -501,7 +611,9 @@ def create_modern_demo() -> gr.Blocks:
                 fn=handle_chat_interaction,
                 inputs=[msg_textbox, chatbot, session_state],
                 outputs=chat_outputs,
-                # queue=True # Handled by demo.queue() later
+                # Both triggers draw from one pool of slots, rather than each getting its own limit
+                concurrency_limit=GRADIO_CONCURRENCY_LIMIT,
+                concurrency_id="chat"
             )
 
         # Clear button action
@@ -528,8 +640,9 @@ def main() -> None:
     logger.info("Creating Gradio demo...")
     demo = create_modern_demo()
 
-    # Enable Gradio queue for handling multiple simultaneous users/requests gracefully
-    demo.queue()
+    # Enable Gradio queue for handling multiple simultaneous users/requests gracefully.
+    # Gradio's default limit is 1 event at a time, which would serialize every chat behind the LLM.
+    demo.queue(default_concurrency_limit=GRADIO_CONCURRENCY_LIMIT, max_size=GRADIO_MAX_QUEUE_SIZE)
 
     # Launch the Gradio app server
     logger.info("Launching Gradio demo server...")
@@ -539,12 +652,17 @@ def main() -> None:
             server_port=7860,
             share=False, # Set to True for a public link (e.g., for Hugging Face Spaces)
             debug=False,
-            max_threads=20,
-            favicon_path=FAVICON_PATH # Use constant defined earlier
+            favicon_path=FAVICON_PATH, # Use constant defined earlier
+            # Streamed replies reach the browser over SSE; keep proxies from collapsing them into one chunk,
+            # and compress everything else (the page, its scripts and the inline stylesheet)
+            app_kwargs={"middleware": [
+                Middleware(GZipExceptStreamsMiddleware),
+                Middleware(NoProxyBufferingMiddleware)
+            ]}
         )
         logger.info("Gradio demo launched. Access locally via http://localhost:7860 or http://127.0.0.1:7860")
     except Exception as e:
-        logger.error(f"Failed to launch Gradio demo: {e}", exc_info=True)
+        logger.error("Failed to launch Gradio demo: %s", e, exc_info=True)
         print(f"Error launching Gradio: {e}")
 
 if __name__ == "__main__":
@@ -1,12 +1,20 @@
 # src/utils/helpers.py
+import asyncio
 import re
 import logging
 import string
+import time
+from typing import Any, AsyncIterator, Dict
 
 logger = logging.getLogger(__name__)
 
 # Update the pattern and compile with debug flag
 ORDER_ID_PATTERN_SEARCH = re.compile(r'[a-zA-Z0-9]{32}')  # Removed capture group parentheses
+# Whole-string validation: exactly 32 ASCII letters/digits (str.isalnum would also accept other scripts)
+ORDER_ID_PATTERN_FULL = re.compile(r'\A[a-zA-Z0-9]{32}\Z')
+# Built once at import instead of on every call
+ORDER_ID_VALID_CHARS = frozenset(string.ascii_letters + string.digits)
+ORDER_ID_LENGTH = 32
 
 def extract_order_id(text: str) -> str | None:
     """
@@ -16,39 +24,78 @@ def extract_order_id(text: str) -> str | None:
     if not isinstance(text, str) or not text:
         logger.debug("Input text is not a non-empty string.")
         return None
-
-    logger.debug("--- Inside extract_order_id ---")
-    logger.debug(f"Input text: '{text}'")
-    logger.debug(f"Input type: {type(text)}")
+    # Cheap reject: text shorter than an order ID cannot contain one
+    if len(text) < ORDER_ID_LENGTH:
+        return None
 
     try:
         # 1. Manual check first - for exact matches
         text = text.strip()
         text_len = len(text)
-        valid_chars = set(string.ascii_letters + string.digits)
-        
+
         # Only do exact match if the string is exactly 32 chars
-        if text_len == 32 and all(c in valid_chars for c in text):
-            logger.debug(f"Extracted order ID (exact match): {text}")
+        if text_len == ORDER_ID_LENGTH and ORDER_ID_VALID_CHARS.issuperset(text):
+            logger.debug("Extracted order ID (exact match): %s", text)
             return text
             
         # 2. If not exact match, search within the string
         logger.debug("Trying regex search within string")
-        # Use findall instead of search to get all matches
-        matches = ORDER_ID_PATTERN_SEARCH.findall(text)
-        logger.debug(f"Found matches: {matches}")
-        
-        if matches:
-            # Take the first match
-            order_id = matches[0]
-            logger.debug(f"Extracted order ID (regex match): {order_id}")
+        # Only the first match is used, so stop scanning as soon as one is found
+        match = ORDER_ID_PATTERN_SEARCH.search(text)
+
+        if match:
+            order_id = match.group(0)
+            logger.debug("Extracted order ID (regex match): %s", order_id)
             return order_id
 
         logger.debug("No valid order ID found")
         return None
 
     except Exception as e:
-        logger.error(f"Exception during operations in extract_order_id: {e}", exc_info=True)
+        logger.error("Exception during operations in extract_order_id: %s", e, exc_info=True)
         return None
+
+
+async def coalesce_updates(
+    updates: AsyncIterator[Dict[str, Any]],
+    max_chars: int = 64,
+    max_wait: float = 0.05
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Thins out a stream of cumulative response updates so the UI is not re-rendered per token.
+
+    An update is passed on once the reply has grown by max_chars, and an update that is held
+    back is passed on no later than max_wait seconds after the previous one, even if nothing
+    new arrives in the meantime. The latest update is always delivered when the stream ends.
+    """
+    pending = None # Newest update not yet passed on; cumulative, so it replaces any older one
+    last_flush = time.monotonic()
+    last_len = 0
+    next_update = None
+    try:
+        while True:
+            if next_update is None:
+                next_update = asyncio.ensure_future(updates.__anext__())
+            # Waiting with a timeout leaves the task running, whereas a timed-out wait_for
+            # would cancel it and with it the step of the underlying generator
+            timeout = None if pending is None else max(0.0, last_flush + max_wait - time.monotonic())
+            done, _ = await asyncio.wait({next_update}, timeout=timeout)
+            if done:
+                try:
+                    pending = next_update.result()
+                except StopAsyncIteration:
+                    break
+                finally:
+                    next_update = None
+                grown = len(pending.get("response", "")) - last_len
+                if grown < max_chars and time.monotonic() - last_flush < max_wait:
+                    continue
+            # Either a bound was hit or the wait ran out with an update still held back
+            update, pending = pending, None
+            last_flush, last_len = time.monotonic(), len(update.get("response", ""))
+            yield update
+        if pending is not None:
+            yield pending
     finally:
-        logger.debug("--- Exiting extract_order_id ---")
\ No newline at end of file
+        if next_update is not None:
+            next_update.cancel()
@@ -28,8 +28,16 @@ def mock_llm_service() -> AsyncMock:
     mock = AsyncMock()
     # Explicitly create the methods we need to call with 'await' as AsyncMocks
     # Set their default return_value. The test will override this as needed.
-    mock.determine_intent = AsyncMock(return_value='unknown')
-    mock.generate_response = AsyncMock(return_value="Mock LLM fallback response.")
+    mock.determine_intent = MagicMock(return_value='unknown')
+    mock.generate_response = MagicMock(return_value="Mock LLM fallback response.")
+    # The manager awaits the async variants; route them to the sync mocks (looked up
+    # at call time, so tests that swap those mocks keep their assertions working)
+    mock.adetermine_intent = AsyncMock(side_effect=lambda **kwargs: mock.determine_intent(**kwargs))
+    mock.agenerate_response = AsyncMock(side_effect=lambda **kwargs: mock.generate_response(**kwargs))
+
+    async def astream_response(**kwargs):
+        yield mock.generate_response(**kwargs)
+    mock.astream_response = MagicMock(side_effect=astream_response)
     return mock
 
 @pytest.fixture
@@ -92,4 +100,5 @@ def conversation_manager(
     manager.available_services['policy_service'] = mock_policy_service
     manager.agents = manager._load_agents()
     manager.intents = list(manager.agents.keys())
+    manager._agent_table = manager._build_agent_table(manager.agents)
     return manager
\ No newline at end of file
@@ -69,10 +69,8 @@ async def test_intent_routing_return_policy(
 
     assert response_data["response"] == expected_policy
     mock_policy_service.get_policy.assert_called_once()
-    mock_llm_service.determine_intent.assert_called_once()
-    args, kwargs = mock_llm_service.determine_intent.call_args
-    assert kwargs.get('user_input') == user_input
-    assert kwargs.get('available_intents') == conversation_manager.intents
+    # "return" is classified by the quick-intent fast path, so the LLM is not consulted
+    mock_llm_service.determine_intent.assert_not_called()
 
 @pytest.mark.asyncio
 async def test_intent_routing_request_human(
@@ -126,6 +124,59 @@ async def test_intent_routing_unknown(
     assert kwargs_gen.get('prompt') == user_input # Check prompt passed correctly
     assert isinstance(kwargs_gen.get('history'), list) # Check history was passed
 
+@pytest.mark.asyncio
+async def test_handle_message_stream_general_query(
+    conversation_manager: ConversationManager,
+    mock_llm_service: AsyncMock,
+    test_session_id: str
+):
+    """General queries stream cumulative text; the final update is recorded in history."""
+    mock_llm_service.determine_intent = MagicMock(return_value='general_query')
+
+    async def stream(**kwargs):
+        for chunk in ("Hello", ", ", "there!"):
+            yield chunk
+    mock_llm_service.astream_response = MagicMock(side_effect=stream)
+
+    updates = [u async for u in conversation_manager.handle_message_stream("hi", test_session_id)]
+
+    assert [u["response"] for u in updates] == ["Hello", "Hello, ", "Hello, there!", "Hello, there!"]
+    assert all(u["session_id"] == test_session_id for u in updates)
+    history = conversation_manager.conversation_states[test_session_id].get_history()
+    assert history[-1] == {'role': 'model', 'parts': ["Hello, there!"]}
+
+@pytest.mark.asyncio
+async def test_handle_message_stream_interrupted_records_error(
+    conversation_manager: ConversationManager,
+    mock_llm_service: AsyncMock,
+    test_session_id: str
+):
+    """A stream that fails mid-reply ends with the error response, not the truncated text."""
+    from src.core.conversation import RESPONSE_AGENT_ERROR
+    mock_llm_service.determine_intent = MagicMock(return_value='general_query')
+
+    async def stream(**kwargs):
+        yield "Hello"
+        raise RuntimeError("connection reset")
+    mock_llm_service.astream_response = MagicMock(side_effect=stream)
+
+    updates = [u async for u in conversation_manager.handle_message_stream("hi", test_session_id)]
+
+    assert [u["response"] for u in updates] == ["Hello", RESPONSE_AGENT_ERROR]
+    history = conversation_manager.conversation_states[test_session_id].get_history()
+    assert history[-1] == {'role': 'model', 'parts': [RESPONSE_AGENT_ERROR]}
+
+@pytest.mark.asyncio
+async def test_handle_message_stream_agent_reply_in_one_piece(
+    conversation_manager: ConversationManager,
+    test_session_id: str
+):
+    """Agent replies are not streamed: a single update carries the full response."""
+    updates = [u async for u in conversation_manager.handle_message_stream("I want a refund", test_session_id)]
+
+    assert len(updates) == 1
+    assert updates[0]["response"] == (await conversation_manager.handle_message("I want a refund", test_session_id))["response"]
+
 # --- Agent Interaction Tests ---
 
 @pytest.mark.asyncio
@@ -148,10 +199,9 @@ async def test_order_status_agent_found(
     response_data_1 = await conversation_manager.handle_message(user_input_1, test_session_id)
 
     assert "Please provide the 32-character alphanumeric order ID" in response_data_1["response"]
-    # Update assertion to match actual history state
+    # The LLM receives a snapshot of the history taken when intent detection runs
     expected_history = [
         {'role': 'user', 'parts': [user_input_1]},
-        {'role': 'model', 'parts': [response_data_1["response"]]}
     ]
     mock_llm_service.determine_intent.assert_called_once_with(
         user_input=user_input_1,
@@ -172,7 +222,8 @@ async def test_order_status_agent_found(
 
     assert response_data_2["response"] == expected_formatted_details
     mock_order_service.get_order_status_by_id.assert_called_once_with(order_id)
-    mock_llm_service.determine_intent.assert_called_once()
+    # A bare order ID is classified without an LLM round-trip
+    mock_llm_service.determine_intent.assert_not_called()
 
 @pytest.mark.asyncio
 async def test_order_status_agent_not_found(
@@ -193,10 +244,9 @@ async def test_order_status_agent_not_found(
     response_data_1 = await conversation_manager.handle_message(user_input_1, test_session_id)
 
     assert "Please provide the 32-character alphanumeric order ID" in response_data_1["response"]
-    # Update assertion to match actual history state
+    # The LLM receives a snapshot of the history taken when intent detection runs
     expected_history = [
         {'role': 'user', 'parts': [user_input_1]},
-        {'role': 'model', 'parts': [response_data_1["response"]]}
     ]
     mock_llm_service.determine_intent.assert_called_once_with(
         user_input=user_input_1,
@@ -217,7 +267,8 @@ async def test_order_status_agent_not_found(
 
     assert response_data_2["response"] == expected_not_found_msg
     mock_order_service.get_order_status_by_id.assert_called_once_with(non_existent_order_id)
-    mock_llm_service.determine_intent.assert_called_once()
+    # A bare order ID is classified without an LLM round-trip
+    mock_llm_service.determine_intent.assert_not_called()
 # --- Helper Function Tests (Synchronous - NO CHANGES NEEDED HERE) ---
 
 def test_format_order_details_delivered(sample_order_data_found):
@@ -318,4 +369,212 @@ async def test_order_status_agent_process_direct_id(
 ])
 def test_extract_order_id(text, expected_id):
     """Test the order ID extraction helper with various inputs."""
-    assert extract_order_id(text) == expected_id
\ No newline at end of file
+    assert extract_order_id(text) == expected_id
+
+@pytest.mark.asyncio
+async def test_coalesce_updates_flushes_held_update_without_waiting_for_next():
+    """An update held back by the time bound is sent once max_wait passes, not when the next one arrives."""
+    import asyncio
+    import time
+    from src.utils.helpers import coalesce_updates
+
+    async def updates():
+        yield {"response": "Hel"}
+        yield {"response": "Hello"} # Within max_wait of the first, so it is held back
+        await asyncio.sleep(0.5) # Slow next chunk
+        yield {"response": "Hello there"}
+
+    start = time.monotonic()
+    received = []
+    async for update in coalesce_updates(updates(), max_chars=64, max_wait=0.05):
+        received.append((update["response"], time.monotonic() - start))
+
+    assert [text for text, _ in received] == ["Hello", "Hello there"]
+    assert received[0][1] < 0.3 # Flushed by the timer, well before the 0.5s chunk
+
+@pytest.mark.parametrize("text, expected_intent", [
+    ("I want to speak to a human", "request_human"),
+    ("Can I get a refund?", "ask_return_policy"),
+    ("e481f51cbdc54678b7cc49136f2d6af7", "check_order_status"),
+    ("Can you track my package?", "check_order_status"),
+    ("I need a tracking number for my refund", "ask_return_policy"), # Earlier patterns win
+    ("refund for order e481f51cbdc54678b7cc49136f2d6af7", "check_order_status"), # Order ID outranks keywords
+    ("return order e481f51cbdc54678b7cc49136f2d6af7", "check_order_status"),
+    ("Can you connect me with a real person?", "request_human"),
+    ("are you a human?", None), # Mentions alone are left to the LLM
+    ("is this an AI agent?", None),
+    ("where is my order", None), # Ambiguous, left to the LLM
+    ("tell me a joke", None),
+])
+def test_quick_intent(text, expected_intent):
+    """Obvious inputs are classified without the LLM; anything else returns None."""
+    from src.core.conversation import _quick_intent
+    assert _quick_intent(text) == expected_intent
+
+# --- Conversation State Tests ---
+
+def test_conversation_state_history_is_bounded(test_session_id):
+    """History keeps only the most recent MAX_CONVERSATION_HISTORY messages."""
+    from src.core.config import MAX_CONVERSATION_HISTORY
+    state = ConversationState(session_id=test_session_id)
+    for i in range(MAX_CONVERSATION_HISTORY + 5):
+        state.add_message(role="user", text=f"message {i}")
+
+    history = state.get_history()
+    assert isinstance(history, list)
+    assert len(history) == MAX_CONVERSATION_HISTORY
+    assert history[0] == {'role': 'user', 'parts': ["message 5"]}
+    assert history[-1] == {'role': 'user', 'parts': [f"message {MAX_CONVERSATION_HISTORY + 4}"]}
+
+
+def test_conversation_state_history_cache_invalidated_on_add(test_session_id):
+    """get_history() reuses its list until a new message arrives."""
+    state = ConversationState(session_id=test_session_id)
+    state.add_message(role="user", text="hello")
+    first = state.get_history()
+    assert state.get_history() is first
+
+    state.add_message(role="model", text="hi there")
+    second = state.get_history()
+    assert first == [{'role': 'user', 'parts': ["hello"]}] # Earlier snapshots are not mutated
+    assert second == [{'role': 'user', 'parts': ["hello"]}, {'role': 'model', 'parts': ["hi there"]}]
+
+
+def test_cleanup_inactive_sessions_evicts_only_stale(conversation_manager):
+    """Cleanup drops sessions idle longer than max_age and keeps recently used ones."""
+    stale_time = datetime.datetime.now() - datetime.timedelta(hours=2)
+    for sid in ("old-1", "old-2", "fresh"):
+        conversation_manager._get_or_create_state(sid).last_interaction_time = stale_time
+    # Touching a session moves it to the most-recent end of the store
+    conversation_manager._get_or_create_state("old-1")
+    conversation_manager._get_or_create_state("fresh").last_interaction_time = datetime.datetime.now()
+
+    conversation_manager.cleanup_inactive_sessions(max_age_seconds=3600)
+
+    assert list(conversation_manager.conversation_states) == ["fresh"]
+
+
+# --- LLM Interface Tests ---
+
+def test_llm_interface_default_stream_yields_full_response():
+    """LLM services without native streaming stream their full response as one chunk."""
+    from src.llm.interface import LLMInterface
+
+    class StaticLLM(LLMInterface):
+        def generate_response(self, prompt, history=None, temperature=0.7, max_output_tokens=1024):
+            return f"echo: {prompt}"
+
+        def determine_intent(self, user_input, available_intents, history=None):
+            return "general_query"
+
+    assert list(StaticLLM().stream_response("hello")) == ["echo: hello"]
+
+@pytest.mark.asyncio
+async def test_llm_interface_default_async_delegates_to_sync():
+    """LLM services without a native async client fall back to their sync methods."""
+    from src.llm.interface import LLMInterface
+
+    class StaticLLM(LLMInterface):
+        def generate_response(self, prompt, history=None, temperature=0.7, max_output_tokens=1024):
+            return f"echo: {prompt}"
+
+        def determine_intent(self, user_input, available_intents, history=None):
+            return available_intents[0]
+
+    llm = StaticLLM()
+    assert await llm.agenerate_response("hello") == "echo: hello"
+    assert await llm.adetermine_intent("hi", ["ask_return_policy"]) == "ask_return_policy"
+
+@pytest.mark.asyncio
+async def test_order_service_caches_lookups(mocker, sample_order_data_found):
+    """Repeat lookups (including misses) are served from the cache until invalidated."""
+    from src.services import order_service
+    order_service.invalidate_cached_order()
+    mock_fetch = mocker.patch(
+        "src.services.order_service._fetch_order",
+        side_effect=lambda order_id: sample_order_data_found if order_id == sample_order_data_found.order_id else None
+    )
+    service = OrderService()
+    missing_id = "0" * 32
+
+    first = await service.get_order_status_by_id(sample_order_data_found.order_id)
+    assert await service.get_order_status_by_id(sample_order_data_found.order_id) == first
+    await service.get_order_status_by_id(missing_id)
+    await service.get_order_status_by_id(missing_id)
+    assert mock_fetch.call_count == 2
+
+    order_service.invalidate_cached_order(sample_order_data_found.order_id)
+    await service.get_order_status_by_id(sample_order_data_found.order_id)
+    assert mock_fetch.call_count == 3
+    order_service.invalidate_cached_order()
+
+@pytest.mark.asyncio
+async def test_order_service_coalesces_concurrent_lookups(mocker, sample_order_data_found):
+    """Concurrent lookups of the same order share one database query."""
+    import asyncio
+    import time
+    from src.services import order_service
+    order_service.invalidate_cached_order()
+    mock_fetch = mocker.patch(
+        "src.services.order_service._fetch_order",
+        side_effect=lambda order_id: time.sleep(0.05) or sample_order_data_found
+    )
+    service = OrderService()
+
+    responses = await asyncio.gather(
+        *(service.get_order_status_by_id(sample_order_data_found.order_id) for _ in range(5))
+    )
+
+    assert len(set(responses)) == 1
+    mock_fetch.assert_called_once()
+    assert not order_service._inflight_lookups
+    order_service.invalidate_cached_order()
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("order_id", ["", "abc123", "é" * 32, "a" * 31 + "-", "a" * 33])
+async def test_order_service_rejects_malformed_ids(mocker, order_id):
+    """Anything but exactly 32 ASCII letters/digits is rejected before touching the database."""
+    mock_fetch = mocker.patch("src.services.order_service._fetch_order")
+    response = await OrderService().get_order_status_by_id(order_id)
+    assert "seems invalid" in response
+    mock_fetch.assert_not_called()
+
+def test_policy_service_missing_file_reports_error(mocker, tmp_path):
+    """A missing policy file yields no sections and surfaces the load error in summaries."""
+    from src.services import policy_service
+    mocker.patch.object(policy_service, "POLICIES_JSON_PATH", str(tmp_path / "missing.json"))
+    policy_service._load_policies.cache_clear()
+    try:
+        service = PolicyService()
+        assert service.get_policy("general_return_policy") is None
+        assert service.get_policy_summary() == "Policy information is currently unavailable."
+        assert dict(service.get_all_policies()) == {"error": "Policy information is currently unavailable."}
+        assert service.get_formatted_policies() == "Policy information is currently unavailable."
+    finally:
+        policy_service._load_policies.cache_clear()
+
+def test_format_order_details_unknown_status(sample_order_data_invoiced):
+    """Statuses without a description fall back to the raw status text."""
+    sample_order_data_invoiced.order_status = "in_transit_to_moon"
+    formatted_details = format_order_details(sample_order_data_invoiced)
+    assert "Status: in_transit_to_moon" in formatted_details
+
+
+@pytest.mark.asyncio
+async def test_human_rep_agent_full_flow(mock_llm_service, test_session_id, mocker):
+    """HumanRepAgent walks name -> email -> phone and saves the contact request."""
+    from src.agents.human_rep_agent import HumanRepAgent, KEY_HUMAN_REP_STEP, STATE_COMPLETE
+    mock_save = mocker.patch("src.agents.human_rep_agent.save_contact_request", return_value=True)
+    agent = HumanRepAgent(llm_service=mock_llm_service)
+    state = ConversationState(session_id=test_session_id)
+
+    assert "full name" in (await agent.process(state, "talk to a human")).lower()
+    assert "email" in (await agent.process(state, "Jane Doe")).lower()
+    assert "phone" in (await agent.process(state, "jane@example.com")).lower()
+    final_response = await agent.process(state, "+1 555 0100")
+
+    assert "Thank you, Jane!" in final_response
+    assert state.extracted_entities[KEY_HUMAN_REP_STEP] == STATE_COMPLETE
+    mock_save.assert_called_once()
+    assert mock_save.call_args.kwargs["email"] == "jane@example.com"
+    assert mock_save.call_args.kwargs["phone_number"] == "+1 555 0100"